@@ -1,4 +1,5 @@
 import streamlit as st
+from backend.resources import start_warmup
 
 # ---------------------------------------------------------
 # INITIAL SESSION SETUP
@@ -15,6 +16,11 @@ def init_session():
 
 init_session()
 
+# ---------------------------------------------------------
+# WARM UP MODELS + INDEX (BACKGROUND, ONCE PER SERVER PROCESS)
+# ---------------------------------------------------------
+start_warmup()
+
 # ---------------------------------------------------------
 # PAGE CONFIG
 # ---------------------------------------------------------
@@ -0,0 +1,136 @@
+import os
+import time
+import numpy as np
+
+from .db import get_db_connection
+from .query_cache import normalize_query
+
+# ---------------------------------------------------------
+# ANSWER CACHE SETTINGS
+# ---------------------------------------------------------
+ANSWER_CACHE = os.environ.get("VETBOT_ANSWER_CACHE", "1") == "1"
+# Cosine similarity above which two questions share an answer
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("VETBOT_ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL_HOURS = float(os.environ.get("VETBOT_ANSWER_CACHE_TTL_HOURS", "168"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("VETBOT_ANSWER_CACHE_MAX_ENTRIES", "2000"))
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+# ---------------------------------------------------------
+# SEMANTIC ANSWER CACHE (SQLite)
+# ---------------------------------------------------------
+class AnswerCache:
+    """
+    Question embedding → generated answer, stored in the app database.
+    Rows are tagged with the index version, so a reindex makes older
+    answers unreachable (they are purged on the next lookup). Expired
+    rows are dropped by TTL, and the least recently used rows once the
+    table is over max_entries.
+    """
+
+    def __init__(self, index_version, threshold=ANSWER_CACHE_THRESHOLD,
+                 ttl_hours=ANSWER_CACHE_TTL_HOURS, max_entries=ANSWER_CACHE_MAX_ENTRIES):
+        self.index_version = index_version
+        self.threshold = threshold
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+
+    def purge(self, conn):
+        conn.execute(
+            "DELETE FROM answer_cache WHERE index_version != ? OR created_at < ?",
+            (self.index_version, time.time() - self.ttl_seconds),
+        )
+
+    def lookup(self, query_vector):
+        """Returns (answer, similarity) for the closest cached question, or (None, best similarity)."""
+        query = _unit(query_vector)
+
+        conn = get_db_connection()
+        try:
+            self.purge(conn)
+            rows = conn.execute(
+                "SELECT id, embedding, answer FROM answer_cache WHERE index_version = ?",
+                (self.index_version,),
+            ).fetchall()
+
+            if not rows:
+                conn.commit()
+                return None, 0.0
+
+            matrix = np.stack([np.frombuffer(row["embedding"], dtype=np.float32) for row in rows])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+
+            if similarity < self.threshold:
+                conn.commit()
+                return None, similarity
+
+            conn.execute(
+                "UPDATE answer_cache SET last_used = ?, hits = hits + 1 WHERE id = ?",
+                (time.time(), rows[best]["id"]),
+            )
+            conn.commit()
+            return rows[best]["answer"], similarity
+        finally:
+            conn.close()
+
+    def lookup_text(self, question):
+        """
+        Returns (answer, 1.0) for a cached question with the same
+        normalized text, or (None, 0.0); used when no query vector exists.
+        """
+        conn = get_db_connection()
+        try:
+            self.purge(conn)
+            row = conn.execute(
+                """
+                SELECT id, answer FROM answer_cache
+                WHERE index_version = ? AND question_norm = ?
+                ORDER BY last_used DESC LIMIT 1
+                """,
+                (self.index_version, normalize_query(question)),
+            ).fetchone()
+
+            if row is None:
+                conn.commit()
+                return None, 0.0
+
+            conn.execute(
+                "UPDATE answer_cache SET last_used = ?, hits = hits + 1 WHERE id = ?",
+                (time.time(), row["id"]),
+            )
+            conn.commit()
+            return row["answer"], 1.0
+        finally:
+            conn.close()
+
+    def store(self, question, query_vector, answer):
+        now = time.time()
+        conn = get_db_connection()
+        try:
+            conn.execute(
+                """
+                INSERT INTO answer_cache
+                    (index_version, question, question_norm, embedding, answer, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (self.index_version, question, normalize_query(question), _unit(query_vector).tobytes(),
+                 answer, now, now),
+            )
+            # Size bound: keep the most recently used rows
+            conn.execute(
+                """
+                DELETE FROM answer_cache WHERE id NOT IN (
+                    SELECT id FROM answer_cache ORDER BY last_used DESC LIMIT ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            conn.commit()
+        finally:
+            conn.close()
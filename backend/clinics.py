@@ -0,0 +1,213 @@
+import os
+import re
+import pandas as pd
+
+# ---------------------------------------------------------
+# PATHS
+# ---------------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+
+# ---------------------------------------------------------
+# COLUMN ALIASES (clinic / doctor tables)
+# ---------------------------------------------------------
+NAME_COLUMNS = ["name", "clinic", "clinic_name", "hospital", "doctor", "doctor_name", "vet", "vet_name"]
+CITY_COLUMNS = ["city", "town", "location", "area", "district"]
+SPECIALTY_COLUMNS = ["specialty", "speciality", "specialization", "specialisation", "services", "department"]
+CONTACT_COLUMNS = ["address", "phone", "phone_number", "contact", "mobile", "email", "timings", "hours"]
+
+CLINIC_WORDS = ["clinic", "clinics", "hospital", "hospitals", "doctor", "doctors", "vet", "vets", "veterinarian"]
+# Names made only of these words ("Vet", "Pet Care") are too generic to identify a clinic
+GENERIC_NAME_WORDS = set(CLINIC_WORDS) | {
+    "the", "my", "best", "dr", "pet", "pets", "animal", "animals", "care", "centre", "center",
+    "dog", "dogs", "cat", "cats", "veterinary",
+}
+
+
+# ---------------------------------------------------------
+# READ A CSV TABLE
+# ---------------------------------------------------------
+def _snake_case(col):
+    return re.sub(r"[^0-9a-z]+", "_", str(col).strip().lower()).strip("_")
+
+
+def read_table(fpath):
+    """
+    Reads a CSV with snake_case column names and typed columns
+    (Int64 / Float64 / boolean / string instead of object).
+    Contact columns stay text, so phone numbers keep their leading zeros.
+    """
+    header = pd.read_csv(fpath, skipinitialspace=True, nrows=0).columns
+    dtype = {col: "string" for col in header if _snake_case(col) in CONTACT_COLUMNS}
+    df = pd.read_csv(fpath, skipinitialspace=True, dtype=dtype)
+    df.columns = [_snake_case(col) for col in df.columns]
+    return df.convert_dtypes()
+
+
+def row_texts(df):
+    """
+    One compact "column: value; column: value" line per row, built
+    column-wise instead of looping over rows. Empty cells are skipped.
+    """
+    text = pd.Series("", index=df.index, dtype="string")
+
+    for col in df.columns:
+        label = col.replace("_", " ")
+        values = df[col].astype("string").str.strip()
+        part = (label + ": " + values).where(values.notna() & (values != ""), "")
+        text = text.str.cat(part, sep="; ")
+
+    return text.str.replace(r"(;\s*)+", "; ", regex=True).str.strip("; ")
+
+
+def row_metadata(df):
+    """Per-row metadata dicts with native Python types and no empty cells."""
+    return [
+        {col: val for col, val in record.items() if not pd.isna(val)}
+        for record in df.to_dict("records")
+    ]
+
+
+def _find_column(columns, aliases):
+    for alias in aliases:
+        if alias in columns:
+            return alias
+    return None
+
+
+# ---------------------------------------------------------
+# STRUCTURED LOOKUP INDEX (city / name / specialty)
+# ---------------------------------------------------------
+_clinic_index = None
+_clinic_index_key = None
+
+
+def _words(text):
+    return re.findall(r"\w+", str(text).lower())
+
+
+def _split_values(value):
+    # "Surgery, Dermatology / Dentistry" → ["surgery", "dermatology", "dentistry"]
+    return [" ".join(_words(v)) for v in re.split(r"[,;/|]", str(value)) if _words(v)]
+
+
+def build_clinic_index(tables):
+    """
+    Builds {"rows": [...], "city": {...}, "name": {...}, "specialty": {...}}
+    from (file, DataFrame) pairs. Each lookup maps a value, as lower-case
+    words joined by single spaces, to row numbers in "rows"; names are
+    kept whole, city / specialty cells are split into their values.
+    "max_words" is the longest value, in words.
+    """
+    index = {"rows": [], "city": {}, "name": {}, "specialty": {}, "max_words": 1}
+
+    for file, df in tables:
+        columns = {
+            "name": _find_column(df.columns, NAME_COLUMNS),
+            "city": _find_column(df.columns, CITY_COLUMNS),
+            "specialty": _find_column(df.columns, SPECIALTY_COLUMNS),
+        }
+        if columns["name"] is None:
+            continue
+
+        for record in row_metadata(df):
+            row_id = len(index["rows"])
+            index["rows"].append({**record, "source": file})
+
+            for field, col in columns.items():
+                if col is None or col not in record:
+                    continue
+                values = [" ".join(_words(record[col]))] if field == "name" else _split_values(record[col])
+                for value in values:
+                    if not value:
+                        continue
+                    index[field].setdefault(value, []).append(row_id)
+                    index["max_words"] = max(index["max_words"], value.count(" ") + 1)
+
+    return index
+
+
+def get_clinic_index():
+    """Loads every CSV in /data/ once; rebuilt only when the files change."""
+    global _clinic_index, _clinic_index_key
+
+    files = sorted(f for f in os.listdir(DATA_DIR) if f.endswith(".csv")) if os.path.exists(DATA_DIR) else []
+    key = tuple((f, os.stat(os.path.join(DATA_DIR, f)).st_mtime_ns) for f in files)
+
+    if _clinic_index is None or key != _clinic_index_key:
+        tables = [(f, read_table(os.path.join(DATA_DIR, f))) for f in files]
+        _clinic_index = build_clinic_index(tables)
+        _clinic_index_key = key
+
+    return _clinic_index
+
+
+def _grams(text, max_words):
+    """Every run of 1..max_words words in text, as lookup keys."""
+    words = _words(text)
+    return {
+        " ".join(words[i:i + n])
+        for n in range(1, max_words + 1)
+        for i in range(len(words) - n + 1)
+    }
+
+
+def _is_specific_name(name):
+    # "Happy Paws Clinic" identifies a clinic; "Vet" or "Pet Care" does not
+    return any(word not in GENERIC_NAME_WORDS for word in name.split())
+
+
+def _hits(grams, lookup, keep=None):
+    # Dict lookups per question n-gram: cost follows the question, not the table
+    hits = set()
+    for gram in grams:
+        row_ids = lookup.get(gram)
+        if row_ids and (keep is None or keep(gram)):
+            hits.update(row_ids)
+    return hits
+
+
+def _format_row(row):
+    name = row.get(_find_column(row, NAME_COLUMNS), "")
+    details = [
+        str(row[col]) for col in CITY_COLUMNS + SPECIALTY_COLUMNS + CONTACT_COLUMNS
+        if col in row
+    ]
+    return f"• {name} — {', '.join(details)}" if details else f"• {name}"
+
+
+# ---------------------------------------------------------
+# ANSWER EXACT CLINIC QUESTIONS (NO EMBEDDING / NO LLM)
+# ---------------------------------------------------------
+def answer_clinic_query(question, limit=5):
+    """
+    Answers questions like "vet clinics in Chennai" or "dermatology
+    doctor in Pune" straight from the lookup index. Returns None when
+    the question is not an exact clinic lookup, so the normal RAG path
+    can handle it.
+    """
+    index = get_clinic_index()
+
+    if not index["rows"]:
+        return None
+
+    # A specific clinic name on its own is enough; city / specialty need a clinic word
+    grams = _grams(question, index["max_words"])
+    names = _hits(grams, index["name"], _is_specific_name)
+    if not names and not any(word in grams for word in CLINIC_WORDS):
+        return None
+
+    # Every mentioned field narrows the result
+    matches = None
+    for hits in (names, _hits(grams, index["city"]), _hits(grams, index["specialty"])):
+        if hits:
+            matches = hits if matches is None else matches & hits
+
+    if not matches:
+        return None
+
+    rows = [index["rows"][i] for i in sorted(matches)[:limit]]
+    lines = [_format_row(row) for row in rows]
+
+    return "Here are the matching clinics/doctors:\n" + "\n".join(lines)
@@ -0,0 +1,228 @@
+import os
+import re
+import numpy as np
+
+from .lexical import tokenize
+from .query_cache import QueryEmbeddingCache
+
+# ---------------------------------------------------------
+# CONTEXT PACKING SETTINGS
+# ---------------------------------------------------------
+# Rough prompt budget for the {context} block (1 token ≈ 4 characters)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("VETBOT_CONTEXT_TOKEN_BUDGET", "350"))
+CHARS_PER_TOKEN = 4
+# Longest chunk overlap looked for when merging neighbouring chunks
+MAX_OVERLAP_CHARS = 300
+
+# Vectors of packed sections / sentences, reused across questions
+CONTEXT_CACHE_SIZE = int(os.environ.get("VETBOT_CONTEXT_CACHE_SIZE", "4096"))
+
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+# "Symptoms:" style headers of the category_*.txt chunks
+SECTION_LINE_RE = re.compile(r"^[A-Za-z][^:\-]{0,40}:$")
+
+unit_cache = QueryEmbeddingCache(CONTEXT_CACHE_SIZE)
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def _chunk_position(doc):
+    # "file::12" → ("file", 12); docs without an id sort on their own
+    chunk_id = doc.metadata.get("chunk_id", "")
+    source, _, number = chunk_id.rpartition("::")
+    if source and number.isdigit():
+        return source, int(number)
+    return doc.metadata.get("source", "") or doc.page_content[:40], None
+
+
+def _title(text):
+    return next((line.strip() for line in text.splitlines() if line.strip()), "")
+
+
+def _strip_overlap(previous, text):
+    """Drops the start of `text` that repeats the end of `previous`."""
+    limit = min(len(previous), len(text), MAX_OVERLAP_CHARS)
+    for size in range(limit, 20, -1):
+        if previous.endswith(text[:size]):
+            return text[size:]
+    return text
+
+
+# ---------------------------------------------------------
+# MERGE ADJACENT CHUNKS
+# ---------------------------------------------------------
+def merge_adjacent(docs):
+    """
+    Joins chunks that are neighbours in the same source (chunk n and
+    n + 1) and belong together: overlapping pieces of the same text
+    (the overlap is removed) or sections under the same title (joined
+    with a blank line, title once). Neighbours about different diseases
+    stay apart. Passages keep the order of their best-ranked chunk.
+    """
+    positioned = [(_chunk_position(doc), rank, doc) for rank, doc in enumerate(docs)]
+    positioned.sort(key=lambda item: (item[0][0], item[0][1] if item[0][1] is not None else -1))
+
+    passages = []  # [best rank, source, last number, text]
+    for (source, number), rank, doc in positioned:
+        text = doc.page_content
+        last = passages[-1] if passages else None
+        merged = None
+        if last and number is not None and last[1] == source and last[2] is not None and number == last[2] + 1:
+            rest = _strip_overlap(last[3], text)
+            if len(rest) < len(text):
+                merged = last[3] + rest
+            elif _title(text) and _title(text) == _title(last[3]):
+                merged = last[3].rstrip() + "\n\n" + text.strip().split("\n", 1)[-1]
+
+        if merged is not None:
+            last[3] = merged
+            last[0] = min(last[0], rank)
+            last[2] = number
+        else:
+            passages.append([rank, source, number, text])
+
+    passages.sort(key=lambda passage: passage[0])
+    return [passage[3] for passage in passages]
+
+
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_SPLIT_RE.split(text) if s and s.strip()]
+
+
+def split_units(text):
+    """
+    Passage → (title line, units), each unit a list of lines packed as a
+    whole: a "Symptoms:"-style header with its bullets, or one sentence
+    of plain text. A header is never packed without its content.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return "", []
+
+    units, prose = [], []
+    for line in lines[1:]:
+        if SECTION_LINE_RE.match(line):
+            units.extend([s] for s in split_sentences(" ".join(prose)))
+            prose = []
+            units.append([line])
+        elif units and SECTION_LINE_RE.match(units[-1][0]) and not prose:
+            units[-1].append(line)
+        else:
+            prose.append(line)
+    units.extend([s] for s in split_sentences(" ".join(prose)))
+
+    # A header with nothing under it says nothing
+    return lines[0], [unit for unit in units if not (len(unit) == 1 and SECTION_LINE_RE.match(unit[0]))]
+
+
+def _lexical_scores(question, texts):
+    # Used when retrieval skipped the embedding (confident keyword query)
+    terms = set(tokenize(question))
+    return np.array([len(terms & set(tokenize(t))) for t in texts], dtype=np.float32)
+
+
+def _unit_vectors(texts, embeddings):
+    """Vectors of packing units; cached per embedding model, so only new text is embedded."""
+    fingerprint = getattr(embeddings, "fingerprint", None)
+    if fingerprint is None:
+        return embeddings.embed_documents(texts)
+
+    vectors = [unit_cache.get(text, fingerprint) for text in texts]
+    missing = sorted({text for text, vector in zip(texts, vectors) if vector is None})
+    if missing:
+        found = dict(zip(missing, embeddings.embed_documents(missing)))
+        for text, vector in found.items():
+            unit_cache.put(text, vector, fingerprint)
+        vectors = [found[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+    return vectors
+
+
+def _dense_scores(query_vector, texts, embeddings):
+    vectors = np.array(_unit_vectors(texts, embeddings), dtype=np.float32)
+    query = np.array(query_vector, dtype=np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    query /= max(float(np.linalg.norm(query)), 1e-12)
+    return vectors @ query
+
+
+def _fit(unit, room):
+    """The unit's lines that fit in `room` tokens: all, or a header with its first bullets."""
+    if estimate_tokens("\n".join(unit)) <= room:
+        return unit
+    if len(unit) < 2 or not SECTION_LINE_RE.match(unit[0]):
+        return None
+    kept = [unit[0]]
+    for line in unit[1:]:
+        if estimate_tokens("\n".join(kept + [line])) > room:
+            break
+        kept.append(line)
+    return kept if len(kept) > 1 else None
+
+
+# ---------------------------------------------------------
+# PACK CONTEXT INTO A TOKEN BUDGET
+# ---------------------------------------------------------
+def pack_context(docs, question, query_vector=None, embeddings=None, budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Turns retrieved Documents into plain prompt text:
+    merges neighbouring chunks, drops overlap and repeated text, ranks
+    units (a section header with its bullets, or a sentence of plain
+    text) by similarity to the question (the query vector the retriever
+    already computed, or term overlap when there is none) and keeps the
+    best ones that fit in `budget` tokens, in reading order.
+    Each passage keeps its first line (the disease / section title).
+    """
+    passages = [split_units(text) for text in merge_adjacent(docs)]
+
+    seen = set()
+    candidates = []  # (passage index, unit index, title + unit text)
+    for p, (title, units) in enumerate(passages):
+        for u, unit in enumerate(units):
+            text = "\n".join(unit)
+            if text.lower() not in seen:
+                # Scored with the title, so "parvo treatment" finds Parvo's Treatment section
+                candidates.append((p, u, f"{title}\n{text}"))
+            seen.add(text.lower())
+
+    if not candidates:
+        return "\n\n".join(title for title, _ in passages if title)
+
+    texts = [text for _, _, text in candidates]
+    if query_vector is not None and embeddings is not None:
+        scores = _dense_scores(query_vector, texts, embeddings)
+    else:
+        scores = _lexical_scores(question, texts)
+        # Units sharing no term with the question are not worth prefilling;
+        # a title match alone ("parvo") only counts when no section text matches
+        own = _lexical_scores(question, [text.split("\n", 1)[1] for text in texts])
+        matched = own if own.max() > 0 else scores
+        if matched.max() > 0:
+            keep = matched > 0
+            candidates = [c for c, k in zip(candidates, keep) if k]
+            scores = scores[keep]
+
+    chosen = {}  # (passage, unit) → lines kept
+    used = 0
+    for i in np.argsort(-scores, kind="stable"):
+        p, u, _ = candidates[i]
+        # A passage's title line is paid for with its first chosen unit
+        room = budget - used
+        if not any(key[0] == p for key in chosen):
+            room -= estimate_tokens(passages[p][0])
+        lines = _fit(passages[p][1][u], room)
+        if lines is None:
+            continue
+        if not any(key[0] == p for key in chosen):
+            used += estimate_tokens(passages[p][0])
+        chosen[(p, u)] = lines
+        used += estimate_tokens("\n".join(lines))
+
+    blocks = []
+    for p, (title, units) in enumerate(passages):
+        kept = [line for u in range(len(units)) for line in chosen.get((p, u), [])]
+        if kept:
+            blocks.append("\n".join([title] + kept))
+
+    return "\n\n".join(blocks)
@@ -0,0 +1,106 @@
+import os
+import re
+
+from .router import entities, tokenize
+
+# ---------------------------------------------------------
+# CONVERSATION SETTINGS
+# ---------------------------------------------------------
+# Earlier user turns searched for the animal / condition being discussed
+FOLLOW_UP_TURNS = int(os.environ.get("VETBOT_FOLLOW_UP_TURNS", "3"))
+# Prompt tokens for the recent-conversation block (1 token ≈ 4 characters)
+HISTORY_TOKEN_BUDGET = int(os.environ.get("VETBOT_HISTORY_TOKEN_BUDGET", "120"))
+HISTORY_MAX_MESSAGES = 6
+CHARS_PER_TOKEN = 4
+
+PRONOUNS = {"it", "its", "this", "that", "these", "those", "they", "them", "their", "he", "she", "him", "her"}
+FOLLOW_UP_OPENERS = re.compile(
+    r"^\s*(and|also|so|then|what about|how about|what if|is it|does it|can it|how long|how often|why)\b",
+    re.IGNORECASE,
+)
+SHORT_QUESTION_WORDS = 5
+
+
+def _user_turns(history):
+    # history: [(role, message), ...] oldest first; role "user" or "bot"
+    return [message for role, message in history if role == "user"]
+
+
+def looks_like_follow_up(question):
+    tokens = tokenize(question)
+    return (
+        bool(PRONOUNS.intersection(tokens))
+        or bool(FOLLOW_UP_OPENERS.match(question))
+        or len(tokens) <= SHORT_QUESTION_WORDS
+    )
+
+
+# ---------------------------------------------------------
+# FOLLOW-UP RESOLVER (NO LLM)
+# ---------------------------------------------------------
+def resolve_follow_up(question, history=None, turns=FOLLOW_UP_TURNS):
+    """
+    Rewrites a follow-up so it stands on its own for retrieval, using the
+    animal and condition named in the last few user turns:
+
+        "my dog has parvo" → "how is it treated?"
+        ⇒ "how is it treated? (dog, parvo)"
+
+    Questions that do not read as a follow-up, or already name what they
+    are about, are returned as is.
+    """
+    if not history or not looks_like_follow_up(question):
+        return question
+
+    animals, conditions = entities(question)
+    if animals and conditions:
+        return question
+
+    needs_condition = not conditions
+    needs_animal = not animals
+    added = []
+
+    # Newest turn first; take each kind from the most recent turn naming it
+    for turn in reversed(_user_turns(history)[-turns:]):
+        turn_animals, turn_conditions = entities(turn)
+        if needs_condition and turn_conditions:
+            added.extend(c for c in turn_conditions if c not in added)
+            needs_condition = False
+        if needs_animal and turn_animals:
+            added = [a for a in turn_animals if a not in added] + added
+            needs_animal = False
+        if not (needs_condition or needs_animal):
+            break
+
+    if not added:
+        return question
+    return f"{question.strip()} ({', '.join(added)})"
+
+
+# ---------------------------------------------------------
+# BOUNDED HISTORY BLOCK FOR THE PROMPT
+# ---------------------------------------------------------
+def format_history(history, budget=HISTORY_TOKEN_BUDGET, max_messages=HISTORY_MAX_MESSAGES):
+    """
+    The most recent messages that fit in `budget` tokens, oldest first,
+    as "User: ..." / "VetBot: ..." lines. Long messages are cut short,
+    so the block stays the same size however long the chat gets.
+    """
+    if not history:
+        return "(none)"
+
+    max_chars = budget * CHARS_PER_TOKEN
+    per_message = max(80, max_chars // 3)
+    lines, used = [], 0
+
+    for role, message in reversed(history[-max_messages:]):
+        text = " ".join(str(message).split())
+        if len(text) > per_message:
+            text = text[:per_message].rsplit(" ", 1)[0] + " …"
+        line = f"{'User' if role == 'user' else 'VetBot'}: {text}"
+        if used + len(line) > max_chars:
+            break
+        lines.append(line)
+        used += len(line)
+
+    return "\n".join(reversed(lines)) if lines else "(none)"
@@ -4,7 +4,7 @@ import os
 # ---------------------------------------------------------
 # DATABASE PATH
 # ---------------------------------------------------------
-DB_PATH = os.path.join(os.path.dirname(__file__), "users.db")
+DB_PATH = os.environ.get("VETBOT_DB_PATH", os.path.join(os.path.dirname(__file__), "users.db"))
 
 
 # ---------------------------------------------------------
@@ -50,6 +50,32 @@ def init_db():
         );
     """)
 
+    # ----------------------------
+    # SEMANTIC ANSWER CACHE TABLE
+    # ----------------------------
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS answer_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            index_version TEXT NOT NULL,
+            question TEXT NOT NULL,
+            question_norm TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            answer TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        );
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_answer_cache_version
+        ON answer_cache (index_version);
+    """)
+    # Exact-text lookups for questions retrieved without an embedding
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_answer_cache_question
+        ON answer_cache (index_version, question_norm);
+    """)
+
     conn.commit()
     conn.close()
 
@@ -0,0 +1,61 @@
+import os
+import json
+import threading
+
+
+# ---------------------------------------------------------
+# CHUNK TEXT ON DISK (JSON LINES)
+# ---------------------------------------------------------
+class DocStore:
+    """
+    Chunk text + metadata, one JSON line per row, appended as chunks
+    are indexed. Callers keep only each row's byte offset and read rows
+    back with a seek, so the corpus text never has to sit in memory.
+    compact() rewrites the file with just the rows still in use.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def append(self, rows):
+        """Writes (text, metadata) rows and returns their offsets."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        offsets = []
+        with open(self.path, "ab") as f:
+            for text, metadata in rows:
+                offsets.append(f.tell())
+                f.write(json.dumps([text, metadata], ensure_ascii=False).encode("utf-8") + b"\n")
+        return offsets
+
+    def _line(self, offset):
+        with self._lock:
+            if self._reader is None:
+                self._reader = open(self.path, "rb")
+            self._reader.seek(offset)
+            return self._reader.readline()
+
+    def get(self, offset):
+        """(text, metadata) of the row at `offset`."""
+        text, metadata = json.loads(self._line(offset))
+        return text, metadata
+
+    def compact(self, offsets):
+        """Keeps only the rows at `offsets` (in that order) → their new offsets."""
+        tmp_path = self.path + ".tmp"
+        new_offsets = []
+        with open(tmp_path, "wb") as f:
+            for offset in offsets:
+                new_offsets.append(f.tell())
+                f.write(self._line(offset))
+
+        self.close()
+        os.replace(tmp_path, self.path)
+        return new_offsets
+
+    def close(self):
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
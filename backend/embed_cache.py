@@ -0,0 +1,183 @@
+import os
+import re
+import json
+import time
+import hashlib
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# ---------------------------------------------------------
+# PATHS / LIMITS
+# ---------------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+# Kept outside vectorstore/ so a --rebuild does not wipe it
+EMBED_CACHE_DIR = os.path.join(BASE_DIR, "embed_cache")
+EMBED_CACHE_MAX_ENTRIES = int(os.environ.get("VETBOT_EMBED_CACHE_MAX_ENTRIES", "200000"))
+
+
+# ---------------------------------------------------------
+# CONTENT-ADDRESSED EMBEDDING CACHE
+# ---------------------------------------------------------
+class EmbeddingCache:
+    """
+    On-disk cache of text → vector, keyed by sha256(model name + text).
+    The "model name" is the embedding fingerprint, so int8 and fp32
+    vectors never mix.
+
+    Vectors live in a memory-mapped float32 .npy file (one row per slot);
+    index.json maps each key to its slot and last-use time. Freed slots
+    are reused, so the file only grows up to max_entries rows.
+    """
+
+    def __init__(self, model_name, cache_dir=EMBED_CACHE_DIR, max_entries=EMBED_CACHE_MAX_ENTRIES):
+        self.model_name = model_name
+        # One sub-folder per model, since vector sizes can differ
+        self.cache_dir = os.path.join(cache_dir, re.sub(r"[^0-9A-Za-z._-]+", "_", model_name))
+        self.max_entries = max_entries
+        self.vectors_path = os.path.join(self.cache_dir, "vectors.npy")
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+
+        self.entries = {}   # key → [slot, last_used]
+        self.free = []
+        self.vectors = None
+        self.hits = 0
+        self.misses = 0
+
+        if os.path.exists(self.index_path) and os.path.exists(self.vectors_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            self.entries = index["entries"]
+            self.free = index["free"]
+            self.vectors = np.load(self.vectors_path, mmap_mode="r+")
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    # -----------------------------------------------------
+    # LOOKUP / STORE
+    # -----------------------------------------------------
+    def get_many(self, texts):
+        """Returns a list with the cached vector (or None) for every text."""
+        now = time.time()
+        found = []
+
+        for text in texts:
+            entry = self.entries.get(self.key(text))
+            if entry is None:
+                self.misses += 1
+                found.append(None)
+            else:
+                self.hits += 1
+                entry[1] = now
+                found.append(np.array(self.vectors[entry[0]]))
+
+        return found
+
+    def put_many(self, texts, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        now = time.time()
+
+        for text, vector in zip(texts, vectors):
+            key = self.key(text)
+            if key in self.entries:
+                continue
+            if len(self.entries) >= self.max_entries:
+                # Free 10% at once instead of sorting on every insert
+                self.evict(max(len(self.entries) - self.max_entries + 1, self.max_entries // 10))
+            slot = self._allocate_slot(vector.shape[0])
+            self.vectors[slot] = vector
+            self.entries[key] = [slot, now]
+
+    def _allocate_slot(self, dim):
+        if self.free:
+            return self.free.pop()
+
+        used = len(self.entries)
+        if self.vectors is None or used >= self.vectors.shape[0]:
+            self._grow(dim, max(1024, used * 2))
+        return used
+
+    def _grow(self, dim, rows):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        rows = min(rows, self.max_entries)
+        old = self.vectors
+
+        tmp_path = self.vectors_path + ".tmp.npy"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(rows, dim))
+        if old is not None:
+            grown[: old.shape[0]] = old
+            del old
+        grown.flush()
+        del grown
+
+        os.replace(tmp_path, self.vectors_path)
+        self.vectors = np.load(self.vectors_path, mmap_mode="r+")
+
+    # -----------------------------------------------------
+    # EVICTION
+    # -----------------------------------------------------
+    def evict(self, count):
+        """Drops the `count` least recently used entries."""
+        if count <= 0:
+            return 0
+        oldest = sorted(self.entries.items(), key=lambda kv: kv[1][1])[:count]
+        for key, (slot, _) in oldest:
+            del self.entries[key]
+            self.free.append(slot)
+        return len(oldest)
+
+    def evict_older_than(self, seconds):
+        """Drops entries not used in the last `seconds` (stale chunks)."""
+        cutoff = time.time() - seconds
+        stale = [key for key, (_, used) in self.entries.items() if used < cutoff]
+        for key in stale:
+            self.free.append(self.entries.pop(key)[0])
+        return len(stale)
+
+    def save(self):
+        if self.vectors is None:
+            return
+        self.vectors.flush()
+
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries, "free": self.free}, f)
+        os.replace(tmp_path, self.index_path)
+
+
+# ---------------------------------------------------------
+# EMBEDDINGS WRAPPER (only embeds unseen text)
+# ---------------------------------------------------------
+class CachedEmbeddings(Embeddings):
+    """Wraps an embeddings model; document embeddings go through the cache."""
+
+    def __init__(self, embeddings, cache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        found = self.cache.get_many(texts)
+        missing = [i for i, vec in enumerate(found) if vec is None]
+
+        if missing:
+            new_vectors = self.embeddings.embed_documents([texts[i] for i in missing])
+            self.cache.put_many([texts[i] for i in missing], new_vectors)
+            for i, vec in zip(missing, new_vectors):
+                found[i] = vec
+
+        return [list(map(float, vec)) for vec in found]
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+
+if __name__ == "__main__":
+    import sys
+    from .embeddings import embedding_fingerprint
+
+    # python -m backend.embed_cache [max_age_days]
+    max_age_days = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    cache = EmbeddingCache(embedding_fingerprint())
+    removed = cache.evict_older_than(max_age_days * 86400)
+    cache.save()
+    print(f"🧹 Evicted {removed} stale embeddings, {len(cache.entries)} left.")
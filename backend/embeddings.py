@@ -0,0 +1,68 @@
+import os
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+# ---------------------------------------------------------
+# EMBEDDING SETTINGS
+# ---------------------------------------------------------
+EMBEDDING_MODEL = os.environ.get("VETBOT_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+# "torch"     → stock sentence-transformers (PyTorch)
+# "onnx"      → ONNX Runtime, same fp32 weights (vectors match torch)
+# "onnx-int8" → ONNX Runtime, int8-quantized weights (faster, approximate)
+EMBEDDING_BACKEND = os.environ.get("VETBOT_EMBEDDING_BACKEND", "torch")
+# Quantized model file inside the HF repo, pick the one for your CPU
+ONNX_INT8_FILE = os.environ.get("VETBOT_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+ENCODE_BATCH_SIZE = int(os.environ.get("VETBOT_ENCODE_BATCH_SIZE", "32"))
+# 0 = let the runtime decide
+EMBED_THREADS = int(os.environ.get("VETBOT_EMBED_THREADS", "0"))
+# MiniLM was trained on 256 tokens; lower = faster on long chunks
+EMBED_MAX_SEQ_LENGTH = int(os.environ.get("VETBOT_EMBED_MAX_SEQ_LENGTH", "256"))
+
+
+def embedding_fingerprint():
+    """
+    Identifies the vector space an index was built in. Backends that
+    produce the same vectors share a fingerprint; anything else (another
+    model, int8 weights, a different max sequence length) does not, and
+    the preprocessor reindexes when it changes.
+    """
+    precision = "int8" if EMBEDDING_BACKEND == "onnx-int8" else "fp32"
+    return f"{EMBEDDING_MODEL}|{precision}|{EMBED_MAX_SEQ_LENGTH}"
+
+
+def _model_kwargs():
+    if EMBEDDING_BACKEND == "torch":
+        if EMBED_THREADS > 0:
+            import torch
+            torch.set_num_threads(EMBED_THREADS)
+        return {"device": "cpu"}
+
+    if EMBEDDING_BACKEND in ("onnx", "onnx-int8"):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if EMBED_THREADS > 0:
+            options.intra_op_num_threads = EMBED_THREADS
+
+        ort_kwargs = {"session_options": options, "provider": "CPUExecutionProvider"}
+        if EMBEDDING_BACKEND == "onnx-int8":
+            ort_kwargs["file_name"] = ONNX_INT8_FILE
+
+        return {"device": "cpu", "backend": "onnx", "model_kwargs": ort_kwargs}
+
+    raise ValueError(f"Unknown VETBOT_EMBEDDING_BACKEND: {EMBEDDING_BACKEND}")
+
+
+# ---------------------------------------------------------
+# CREATE EMBEDDINGS MODEL (LOCAL)
+# ---------------------------------------------------------
+def get_embedding_model():
+    print(f"🔍 Loading MiniLM embeddings (local, {EMBEDDING_BACKEND})...")
+    embeddings = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        model_kwargs=_model_kwargs(),
+        encode_kwargs={"batch_size": ENCODE_BATCH_SIZE}
+    )
+    embeddings.client.max_seq_length = EMBED_MAX_SEQ_LENGTH
+    return embeddings
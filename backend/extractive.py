@@ -0,0 +1,97 @@
+import re
+
+from .context import split_sentences
+from .lexical import tokenize
+
+# ---------------------------------------------------------
+# EXTRACTIVE ANSWER SETTINGS
+# ---------------------------------------------------------
+# Same limit the prompt gives the LLM ("8-10 lines max")
+MAX_ANSWER_LINES = 8
+ITEMS_PER_LINE = 5
+# Lines of plain (non-sectioned) text, e.g. from the PDF encyclopedia
+MAX_SENTENCES = 4
+
+NO_INFO_REPLY = "I don't have enough information from the documents."
+FALLBACK_NOTE = "VetBot is answering slowly right now, so here is what the documents say:"
+
+SECTION_LINE_RE = re.compile(r"^([A-Za-z][^:\-]{0,40}):$")
+BULLET_RE = re.compile(r"^[-•*]\s*")
+
+# Question wording → section names (substrings) to answer from, in order
+SECTION_INTENTS = [
+    (re.compile(r"\b(symptom|sign|know if|tell if|look like|notice)"), ["symptom", "sign"]),
+    (re.compile(r"\b(treat|cure|medicine|medication|remedy|first aid|what (should|can|do) i do|help)"),
+     ["first aid", "treatment", "home care", "what to do", "do not"]),
+    (re.compile(r"\b(cause|why|how did|get it|catch)"), ["cause", "transmission", "spread"]),
+    (re.compile(r"\b(prevent|avoid|stop it|vaccine|vaccinat)"), ["prevention", "vaccin"]),
+    (re.compile(r"\b(emergency|urgent|serious|danger|when .*vet)"), ["emergency", "when to"]),
+]
+# Symptoms and what to do about them, when the wording says nothing more specific
+DEFAULT_SECTIONS = ["symptom", "first aid", "treatment"]
+
+
+def wanted_sections(question):
+    text = question.lower()
+    wanted = []
+    for pattern, sections in SECTION_INTENTS:
+        if pattern.search(text):
+            wanted.extend(s for s in sections if s not in wanted)
+    return wanted or DEFAULT_SECTIONS
+
+
+def parse_sections(text):
+    """
+    Chunk text from a category_*.txt file → (title, [(section, items)]).
+    The first line is the disease title; "Symptoms:"-style lines start
+    sections and the lines under them (bullets stripped) are the items.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return "", []
+
+    title, sections = lines[0], []
+    for line in lines[1:]:
+        m = SECTION_LINE_RE.match(line)
+        if m:
+            sections.append((m.group(1), []))
+        elif sections:
+            sections[-1][1].append(BULLET_RE.sub("", line))
+    return title, sections
+
+
+# ---------------------------------------------------------
+# EXTRACTIVE ANSWER (NO LLM)
+# ---------------------------------------------------------
+def extractive_answer(question, docs, context=""):
+    """
+    A short answer built only from text retrieval already found, for
+    when the LLM cannot answer within the latency budget: the sections
+    the question asks about (Symptoms / First Aid / Treatment ... by
+    default) of the best-ranked diseases, one line per section, or the
+    best-matching sentences of the packed context for unstructured text.
+    """
+    wanted = wanted_sections(question)
+    lines = []
+    seen = set()
+
+    for doc in docs:
+        title, sections = parse_sections(doc.page_content)
+        for want in wanted:
+            for name, items in sections:
+                key = (title, name)
+                if want in name.lower() and items and key not in seen:
+                    seen.add(key)
+                    lines.append(f"{title} — {name}: {'; '.join(items[:ITEMS_PER_LINE])}")
+        if len(lines) >= MAX_ANSWER_LINES:
+            break
+
+    if not lines:
+        # Unstructured chunks: the packed context is already ranked and deduplicated
+        terms = set(tokenize(question))
+        sentences = [s for s in split_sentences(context) if terms & set(tokenize(s))]
+        lines = sentences[:MAX_SENTENCES]
+
+    if not lines:
+        return NO_INFO_REPLY
+    return "\n".join([FALLBACK_NOTE] + lines[:MAX_ANSWER_LINES])
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from .db import get_db_connection
+
+
+# ---------------------------------------------
+# Save chat history
+# ---------------------------------------------
+def save_chat_history(user_id: int, question: str, answer: str):
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    cur.execute("""
+        INSERT INTO history (user_id, question, answer, timestamp)
+        VALUES (?, ?, ?, ?)
+    """, (user_id, question, answer, timestamp))
+
+    conn.commit()
+    conn.close()
+
+
+# ---------------------------------------------
+# Load chat history
+# ---------------------------------------------
+def load_chat_history(user_id: int):
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT question, answer, timestamp
+        FROM history
+        WHERE user_id = ?
+        ORDER BY id DESC
+    """, (user_id,))
+
+    rows = cur.fetchall()
+    conn.close()
+
+    return rows
@@ -0,0 +1,130 @@
+"""
+Recall / latency benchmark for the flat index and its ANN modes.
+
+    python -m backend.index_bench --k 5 --ivf-nprobe 1,2,4,8,16 --hnsw-ef 16,32,64
+    python -m backend.index_bench --storage float16,int8 --pca 0,128 --rescore 0,4
+
+Queries are either real questions (--questions file, one per line) or
+stored vectors with a little noise added, as stand-ins for paraphrases.
+Recall@k is measured against exact float32 search over the same index.
+The compression sweep also prints the search-matrix size.
+"""
+import argparse
+import time
+import numpy as np
+
+from .preprocessor import FLAT_INDEX_DIR
+from .vector_index import FlatIndex, IVFIndex, HNSWIndex, VectorCodec, normalize
+
+
+def make_queries(index, args):
+    if args.questions:
+        from .embeddings import get_embedding_model
+
+        with open(args.questions, "r", encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+        vectors = get_embedding_model().embed_documents(questions)
+        return normalize(np.asarray(vectors, dtype=np.float32))
+
+    rng = np.random.default_rng(args.seed)
+    vectors = np.asarray(index.vectors)
+    picked = vectors[rng.choice(vectors.shape[0], min(args.queries, vectors.shape[0]), replace=False)]
+    noise = rng.normal(scale=args.noise, size=picked.shape).astype(np.float32)
+    return normalize(picked + noise)
+
+
+def run(index, queries, k, exact=False):
+    """Returns (results, latencies_ms) for all queries."""
+    results, latencies = [], []
+    for query in queries:
+        t0 = time.perf_counter()
+        hits = index.search_rows(query, k, exact=exact)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        results.append({row for row, _ in hits})
+    return results, np.asarray(latencies)
+
+
+def report(name, results, latencies, truth, k, build_seconds=0.0, memory=None):
+    recall = np.mean([len(r & t) / max(1, min(k, len(t))) for r, t in zip(results, truth)])
+    line = (
+        f"{name:<34} recall@{k}={recall:.3f}  "
+        f"p50={np.percentile(latencies, 50):.3f}ms  p99={np.percentile(latencies, 99):.3f}ms  "
+        f"build={build_seconds:.2f}s"
+    )
+    if memory is not None:
+        line += f"  memory={memory / 2**20:.2f}MB"
+    print(line)
+
+
+def parse_list(value):
+    return [int(v) for v in value.split(",") if v.strip()] if value else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200, help="sampled queries when --questions is not given")
+    parser.add_argument("--questions", help="text file with one question per line")
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ivf-nlist", type=int, default=0, help="0 = sqrt(N)")
+    parser.add_argument("--ivf-nprobe", default="1,2,4,8,16")
+    parser.add_argument("--hnsw-m", type=int, default=16)
+    parser.add_argument("--hnsw-ef-construction", type=int, default=200)
+    parser.add_argument("--hnsw-ef", default="")
+    parser.add_argument("--storage", default="", help="e.g. float16,int8")
+    parser.add_argument("--pca", default="0", help="PCA dimensions to try, 0 = off")
+    parser.add_argument("--rescore", default="0,4", help="re-score factors to try, 0 = off")
+    args = parser.parse_args()
+
+    index = FlatIndex(FLAT_INDEX_DIR)
+    if len(index) == 0:
+        print("⚠ Flat index is empty. Build it with VETBOT_VECTOR_BACKEND=flat python -m backend.preprocessor")
+        return
+
+    queries = make_queries(index, args)
+    print(f"📐 {len(index)} vectors, {len(queries)} queries, k={args.k}")
+
+    vectors = np.asarray(index.vectors)
+    saved = index.ann, index.codec, index.codes, index.rescore_factor
+    index.ann = index.codec = index.codes = None
+
+    truth, latencies = run(index, queries, args.k, exact=True)
+    report("exact float32", truth, latencies, truth, args.k, memory=vectors.nbytes)
+
+    storages = [v.strip() for v in args.storage.split(",") if v.strip()]
+    for dtype in storages:
+        for pca_dim in parse_list(args.pca):
+            t0 = time.perf_counter()
+            index.codec, index.codes = VectorCodec.build(vectors, dtype, pca_dim)
+            build_seconds = time.perf_counter() - t0
+            memory = index.codes.nbytes + index.codec.extra_bytes()
+
+            for factor in parse_list(args.rescore):
+                index.rescore_factor = factor
+                results, latencies = run(index, queries, args.k)
+                name = f"{dtype} pca={pca_dim or 'off'} rescore={factor or 'off'}"
+                report(name, results, latencies, truth, args.k, build_seconds, memory)
+
+    index.codec = index.codes = None
+
+    for nprobe in parse_list(args.ivf_nprobe):
+        t0 = time.perf_counter()
+        index.ann = IVFIndex.build(vectors, nlist=args.ivf_nlist, nprobe=nprobe)
+        build_seconds = time.perf_counter() - t0
+        results, latencies = run(index, queries, args.k)
+        nlist = index.ann.centroids.shape[0]
+        report(f"ivf nlist={nlist} nprobe={nprobe}", results, latencies, truth, args.k, build_seconds)
+
+    for ef in parse_list(args.hnsw_ef):
+        t0 = time.perf_counter()
+        index.ann = HNSWIndex.build(vectors, m=args.hnsw_m, ef_construction=args.hnsw_ef_construction, ef_search=ef)
+        build_seconds = time.perf_counter() - t0
+        results, latencies = run(index, queries, args.k)
+        report(f"hnsw M={args.hnsw_m} ef={ef}", results, latencies, truth, args.k, build_seconds)
+
+    index.ann, index.codec, index.codes, index.rescore_factor = saved
+
+
+if __name__ == "__main__":
+    main()
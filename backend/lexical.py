@@ -0,0 +1,136 @@
+import os
+import re
+import json
+import math
+
+from .doc_store import DocStore
+
+# ---------------------------------------------------------
+# TOKENIZER
+# ---------------------------------------------------------
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "has", "have", "how", "i", "in", "is", "it", "its", "my", "of", "on",
+    "or", "should", "that", "the", "their", "this", "to", "was", "what", "when",
+    "which", "who", "why", "will", "with", "you", "your",
+}
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        # Cheap plural folding: "ticks" → "tick", "fleas" → "flea"
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+# ---------------------------------------------------------
+# BM25 INVERTED INDEX
+# ---------------------------------------------------------
+class BM25Index:
+    """
+    In-process inverted index with BM25 scoring, keyed by chunk id.
+    Postings are persisted as one JSON file; each chunk's text and
+    metadata go to a DocStore next to it (<name>_docs.jsonl), so hits
+    can be returned without touching the vector store and without
+    keeping the corpus text in memory.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, path):
+        self.path = path
+        self.postings = {}   # term → {chunk_id: term frequency}
+        self.lengths = {}    # chunk_id → number of tokens
+        self.offsets = {}    # chunk_id → row offset in self.docs
+        self.docs = DocStore(os.path.splitext(path)[0] + "_docs.jsonl")
+        self.total_length = 0
+        self._garbage = 0    # replaced / deleted rows still in the docs file
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.postings = data["postings"]
+            self.lengths = data["lengths"]
+            self.offsets = data["offsets"]
+            self.total_length = sum(self.lengths.values())
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, ids, texts, metadatas):
+        offsets = self.docs.append(zip(texts, metadatas))
+        for chunk_id, text, offset in zip(ids, texts, offsets):
+            if chunk_id in self.lengths:
+                self.delete([chunk_id])
+
+            tokens = tokenize(text)
+            for token in tokens:
+                postings = self.postings.setdefault(token, {})
+                postings[chunk_id] = postings.get(chunk_id, 0) + 1
+
+            self.lengths[chunk_id] = len(tokens)
+            self.total_length += len(tokens)
+            self.offsets[chunk_id] = offset
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            if chunk_id not in self.lengths:
+                continue
+            for token in set(tokenize(self.document(chunk_id)[0])):
+                postings = self.postings.get(token)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self.postings[token]
+            self.total_length -= self.lengths.pop(chunk_id)
+            del self.offsets[chunk_id]
+            self._garbage += 1
+
+    def document(self, chunk_id):
+        """(text, metadata) of an indexed chunk."""
+        return self.docs.get(self.offsets[chunk_id])
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if self._garbage:
+            ids = list(self.offsets)
+            self.offsets = dict(zip(ids, self.docs.compact([self.offsets[i] for i in ids])))
+            self._garbage = 0
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"postings": self.postings, "lengths": self.lengths, "offsets": self.offsets}, f)
+        os.replace(tmp_path, self.path)
+
+    def search(self, query, k=10):
+        """Returns [(chunk_id, score), ...] best first; no model call involved."""
+        n = len(self.lengths)
+        if n == 0:
+            return []
+
+        avg_length = self.total_length / n
+        scores = {}
+
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                norm = tf + self.K1 * (1 - self.B + self.B * self.lengths[chunk_id] / avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.K1 + 1) / norm
+
+        return sorted(scores.items(), key=lambda item: -item[1])[:k]
+
+    def known_terms(self, query):
+        """(number of query terms, number found in the index)."""
+        tokens = set(tokenize(query))
+        return len(tokens), sum(1 for token in tokens if token in self.postings)
@@ -0,0 +1,402 @@
+"""
+LLM backends behind one streaming, cancellable interface.
+
+    ollama    – Ollama over HTTP (default), tuned options, pooled connection
+    llamacpp  – a GGUF model loaded in-process with llama-cpp-python, no HTTP hop
+    stub      – deterministic local stub server (backend/llm_stub.py), for tests
+
+Settings come from a JSON file (VETBOT_LLM_CONFIG, default llm_config.json
+in the project root) and environment variables, which win over the file.
+"""
+import os
+import json
+import socket
+import asyncio
+import threading
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+
+# ---------------------------------------------------------
+# LLM SETTINGS (file → environment)
+# ---------------------------------------------------------
+LLM_CONFIG_PATH = os.environ.get("VETBOT_LLM_CONFIG", os.path.join(BASE_DIR, "llm_config.json"))
+
+# key: (default, environment variable); 0 (temperature: < 0) = runtime default
+LLM_SETTINGS = {
+    "backend": ("ollama", "VETBOT_LLM_BACKEND"),
+    "model": ("phi3:mini", "VETBOT_LLM_MODEL"),
+    "base_url": ("http://localhost:11434", "VETBOT_OLLAMA_URL"),
+    # How long Ollama keeps the model in memory after the last request
+    "keep_alive": ("30m", "VETBOT_OLLAMA_KEEP_ALIVE"),
+    "num_ctx": (2048, "VETBOT_LLM_NUM_CTX"),
+    "num_thread": (0, "VETBOT_LLM_THREADS"),
+    # Answer length cap; ~200 tokens is the prompt's "8-10 lines max"
+    "num_predict": (200, "VETBOT_LLM_NUM_PREDICT"),
+    "temperature": (-1.0, "VETBOT_LLM_TEMPERATURE"),
+    "connect_timeout": (5.0, "VETBOT_LLM_CONNECT_TIMEOUT"),
+    "read_timeout": (120.0, "VETBOT_LLM_READ_TIMEOUT"),
+    # llamacpp backend
+    "model_path": (os.path.join(BASE_DIR, "models", "phi3-mini-4k-instruct-q4.gguf"), "VETBOT_LLM_MODEL_PATH"),
+    # stub backend
+    "stub_tokens_per_second": (50.0, "VETBOT_LLM_STUB_TOKENS_PER_SECOND"),
+    "stub_first_token_delay": (0.0, "VETBOT_LLM_STUB_FIRST_TOKEN_DELAY"),
+}
+
+
+def load_llm_config(path=LLM_CONFIG_PATH):
+    """Defaults, then the JSON file (if any), then environment variables."""
+    config = {key: default for key, (default, _) in LLM_SETTINGS.items()}
+
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            from_file = json.load(f)
+        unknown = set(from_file) - set(LLM_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown LLM settings in {path}: {', '.join(sorted(unknown))}")
+        config.update(from_file)
+
+    for key, (default, env) in LLM_SETTINGS.items():
+        if env in os.environ:
+            config[key] = os.environ[env]
+        config[key] = type(default)(config[key])
+    return config
+
+
+LLM_CONFIG = load_llm_config()
+LLM_MODEL = LLM_CONFIG["model"]
+OLLAMA_URL = LLM_CONFIG["base_url"]
+OLLAMA_KEEP_ALIVE = LLM_CONFIG["keep_alive"]
+
+# Carry Ollama's returned `context` tokens from one chat turn to the next,
+# so a follow-up only prefills its own new tokens
+SESSION_CONTEXT = os.environ.get("VETBOT_LLM_SESSION_CONTEXT", "0") == "1"
+# A session starts over (full prompt with history) past this many tokens,
+# well inside phi3's context window
+SESSION_CONTEXT_MAX_TOKENS = int(os.environ.get("VETBOT_LLM_SESSION_CONTEXT_MAX_TOKENS", "1536"))
+
+
+# ---------------------------------------------------------
+# PER-CHAT SESSION STATE
+# ---------------------------------------------------------
+class LLMSession:
+    """
+    Token state of one chat conversation: the `context` Ollama returned
+    for the last answer (system prompt, earlier turns and answers) plus
+    running prefill totals. Keep one per chat session.
+    """
+
+    def __init__(self):
+        self.context = None
+        self.turns = 0
+        self.prompt_tokens = 0
+        self.prefill_saved = 0
+
+    def usable(self):
+        """True when the next turn can continue from the stored tokens."""
+        return SESSION_CONTEXT and bool(self.context) and len(self.context) <= SESSION_CONTEXT_MAX_TOKENS
+
+    def reset(self):
+        self.context = None
+
+
+def prefill_stats(final):
+    """
+    Prefill numbers from Ollama's final stream message:
+    prompt_tokens (whole prompt incl. carried context), prefill_tokens
+    (actually evaluated) and prefill_saved (reused from the KV cache).
+    """
+    generated = final.get("eval_count", 0)
+    prompt_tokens = max(len(final.get("context") or []) - generated, 0)
+    prefill_tokens = final.get("prompt_eval_count", prompt_tokens)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "prefill_tokens": prefill_tokens,
+        "prefill_saved": max(prompt_tokens - prefill_tokens, 0),
+    }
+
+
+# ---------------------------------------------------------
+# COMMON INTERFACE
+# ---------------------------------------------------------
+class LLMBackend:
+    """
+    stream() yields answer text as it is generated and stops once
+    `cancel` (a threading.Event) is set, ending the generation itself
+    (stats["cancelled"] = True). astream() is the async version; closing
+    it early cancels the generation too, and `finished` (an asyncio
+    future) completes when the generation has really stopped, which can
+    be later. Subclasses implement _stream().
+    """
+
+    name = "base"
+
+    def __init__(self, system, config, stop=()):
+        self.system = system
+        self.config = config
+        # Generation ends at any of these (e.g. the model starting a new "Question:")
+        self.stop = list(stop)
+
+    def preload(self):
+        """Loads the model now so the first question does not wait for it."""
+
+    def _stream(self, prompt, session, stats, cancel):
+        raise NotImplementedError
+
+    def stream(self, prompt, session=None, stats=None, cancel=None):
+        stats = {} if stats is None else stats
+        stats["cancelled"] = False
+        cancel = cancel or threading.Event()
+        return self._stream(prompt, session, stats, cancel)
+
+    def generate(self, prompt, session=None, stats=None, cancel=None):
+        return "".join(self.stream(prompt, session, stats, cancel))
+
+    async def astream(self, prompt, session=None, stats=None, cancel=None, finished=None):
+        """Async stream(); generation runs in a worker thread."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+        cancel = cancel or threading.Event()
+
+        def exited(_=None):
+            if finished is not None and not finished.done():
+                finished.set_result(None)
+
+        def worker():
+            try:
+                for piece in self.stream(prompt, session, stats, cancel):
+                    loop.call_soon_threadsafe(queue.put_nowait, piece)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+                loop.call_soon_threadsafe(exited)
+
+        try:
+            threading.Thread(target=worker, name=f"vetbot-llm-{self.name}", daemon=True).start()
+        except Exception:
+            exited()
+            raise
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Consumer stopped early (task cancelled, aclose()): stop generating
+            cancel.set()
+
+    async def agenerate(self, prompt, session=None, stats=None, cancel=None):
+        # Waits for the full answer, so the generation has ended on return
+        return "".join([piece async for piece in self.astream(prompt, session, stats, cancel)])
+
+    @staticmethod
+    def _finish(session, numbers, stats, context=None):
+        stats.update(numbers)
+        if session is not None:
+            session.context = context if SESSION_CONTEXT else None
+            session.turns += 1
+            session.prompt_tokens += numbers.get("prompt_tokens", 0)
+            session.prefill_saved += numbers.get("prefill_saved", 0)
+
+
+# ---------------------------------------------------------
+# OLLAMA (HTTP, /api/generate)
+# ---------------------------------------------------------
+class OllamaBackend(LLMBackend):
+    """
+    Talks to Ollama directly so that:
+      - the static instructions go as the `system` prompt, rendered first
+        and byte-identical on every request → Ollama reuses their KV cache
+        and only prefills what follows (history, context, question);
+      - the `context` tokens of an answer can be sent back on the next
+        turn of the same chat (LLMSession);
+      - one requests.Session keeps the connection open between questions.
+    """
+
+    name = "ollama"
+
+    def __init__(self, system, config, stop=()):
+        import requests
+
+        super().__init__(system, config, stop)
+        self.base_url = config["base_url"].rstrip("/")
+        self.http = requests.Session()
+        self.timeout = (config["connect_timeout"], config["read_timeout"])
+
+    def options(self):
+        """Ollama `options`; unset values keep the model's defaults."""
+        options = {key: self.config[key] for key in ("num_ctx", "num_thread", "num_predict") if self.config[key] > 0}
+        if self.config["temperature"] >= 0:
+            options["temperature"] = self.config["temperature"]
+        if self.stop:
+            options["stop"] = self.stop
+        return options
+
+    def _post(self, payload, stream=False):
+        response = self.http.post(f"{self.base_url}/api/generate", json=payload, stream=stream, timeout=self.timeout)
+        if response.status_code >= 400:
+            response.close()
+            raise RuntimeError(f"Ollama returned {response.status_code}: {response.text[:200]}")
+        return response
+
+    def preload(self):
+        """Asks Ollama to load the model now (empty prompt) and keep it resident."""
+        payload = {"model": self.config["model"], "prompt": "", "keep_alive": self.config["keep_alive"]}
+        self.http.post(f"{self.base_url}/api/generate", json=payload, timeout=(self.timeout[0], 300)).close()
+
+    @staticmethod
+    def _close_on_cancel(response, cancel, stopped):
+        while not stopped.is_set():
+            if cancel.wait(0.05):
+                # close() alone does not wake a read blocked in another
+                # thread; shutting the socket down does
+                sock = getattr(getattr(response.raw, "_connection", None), "sock", None)
+                if sock is not None:
+                    try:
+                        sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+                response.close()
+                return
+
+    def _stream(self, prompt, session, stats, cancel):
+        """
+        With a session whose context is usable, `prompt` continues that
+        conversation and the system prompt is not sent again (it is
+        already in the tokens).
+        """
+        payload = {
+            "model": self.config["model"],
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": self.config["keep_alive"],
+            "options": self.options(),
+        }
+        if session is not None and session.usable():
+            payload["context"] = session.context
+        else:
+            payload["system"] = self.system
+
+        final = {}
+        # The POST returns once Ollama sends its first token; until then
+        # (queued or prefilling) there is nothing to close
+        stopped = threading.Event()
+        with self._post(payload, stream=True) as response:
+            # Closing the response makes Ollama stop generating; a watcher
+            # does it as soon as `cancel` is set, not at the next token
+            threading.Thread(target=self._close_on_cancel, args=(response, cancel, stopped), daemon=True).start()
+            try:
+                for line in response.iter_lines():
+                    if cancel.is_set():
+                        break
+                    if not line.strip():
+                        continue
+                    message = json.loads(line)
+                    if message.get("error"):
+                        raise RuntimeError(message["error"])
+                    if message.get("response"):
+                        yield message["response"]
+                    if message.get("done"):
+                        final = message
+                        break
+            except Exception:
+                if not cancel.is_set():
+                    raise
+            finally:
+                stopped.set()
+
+        if cancel.is_set() and not final:
+            stats["cancelled"] = True
+            if session is not None:
+                session.reset()
+            return
+
+        self._finish(session, prefill_stats(final), stats, final.get("context"))
+
+
+# ---------------------------------------------------------
+# LLAMA.CPP (in process, GGUF)
+# ---------------------------------------------------------
+class LlamaCppBackend(LLMBackend):
+    """
+    Runs a GGUF model inside the app process: no HTTP hop and no separate
+    server. llama.cpp keeps the KV cache of the previous prompt and only
+    evaluates what differs, so the fixed system prompt is reused here too
+    (there is no `context` to carry; sessions always send the full prompt).
+    """
+
+    name = "llamacpp"
+
+    def __init__(self, system, config, stop=()):
+        try:
+            from llama_cpp import Llama
+        except ImportError:
+            raise ImportError("VETBOT_LLM_BACKEND=llamacpp needs llama-cpp-python: pip install llama-cpp-python")
+
+        super().__init__(system, config, stop)
+        if not os.path.exists(config["model_path"]):
+            raise FileNotFoundError(f"GGUF model not found: {config['model_path']} (set VETBOT_LLM_MODEL_PATH)")
+
+        self.llm = Llama(
+            model_path=config["model_path"],
+            n_ctx=config["num_ctx"],
+            n_threads=config["num_thread"] or None,
+            verbose=False,
+        )
+        # One generation at a time per loaded model
+        self.lock = threading.Lock()
+
+    def _stream(self, prompt, session, stats, cancel):
+        messages = [{"role": "system", "content": self.system}, {"role": "user", "content": prompt}]
+        options = {"max_tokens": self.config["num_predict"] or None, "stop": self.stop or None}
+        if self.config["temperature"] >= 0:
+            options["temperature"] = self.config["temperature"]
+
+        with self.lock:
+            chunks = self.llm.create_chat_completion(messages, stream=True, **options)
+            try:
+                for chunk in chunks:
+                    if cancel.is_set():
+                        stats["cancelled"] = True
+                        return
+                    piece = chunk["choices"][0]["delta"].get("content")
+                    if piece:
+                        yield piece
+            finally:
+                # Stops token generation when we leave early
+                chunks.close()
+
+        self._finish(session, {}, stats)
+
+
+# ---------------------------------------------------------
+# BACKEND FACTORY
+# ---------------------------------------------------------
+def create_backend(system, config=None, stop=()):
+    """The LLM backend named by config["backend"]."""
+    config = dict(LLM_CONFIG if config is None else config)
+    name = config["backend"]
+
+    if name == "ollama":
+        return OllamaBackend(system, config, stop)
+    if name == "llamacpp":
+        return LlamaCppBackend(system, config, stop)
+    if name == "stub":
+        from .llm_stub import start_stub_server
+
+        server = start_stub_server(
+            tokens_per_second=config["stub_tokens_per_second"],
+            first_token_delay=config["stub_first_token_delay"],
+        )
+        config["base_url"] = f"http://127.0.0.1:{server.server_port}"
+        print(f"🧪 Using the stub LLM on {config['base_url']}")
+        # Same HTTP client as Ollama, so tests cover the real request path
+        backend = OllamaBackend(system, config, stop)
+        backend.stub_server = server
+        return backend
+
+    raise ValueError(f"Unknown VETBOT_LLM_BACKEND: {name!r} (ollama, llamacpp or stub)")
@@ -0,0 +1,187 @@
+"""
+Deterministic stand-in for Ollama's /api/generate, for tests and benchmarks.
+
+    python -m backend.llm_stub --port 11435 --tokens-per-second 20
+    VETBOT_OLLAMA_URL=http://localhost:11435 streamlit run app.py
+
+Or VETBOT_LLM_BACKEND=stub to start one inside the app process.
+The answer is always the first sentences of the prompt's Context block,
+streamed one word per token at a fixed rate; like Ollama, nothing is sent
+before the first token and a client that hangs up drops its request.
+Prompt tokens are words; the prefix shared with the previous request
+counts as cached, like Ollama's KV cache, so prefill numbers behave the
+same way.
+"""
+import re
+import json
+import time
+import zlib
+import socket
+import select
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTEXT_RE = re.compile(r"Context:\s*(.*?)\s*\n\s*Question:", re.DOTALL)
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+ANSWER_SENTENCES = 3
+NO_CONTEXT_REPLY = "I don't have enough information from the documents."
+
+
+def stub_answer(prompt):
+    """The reply for a prompt: its first context sentences, always the same."""
+    found = CONTEXT_RE.search(prompt)
+    context = " ".join(found.group(1).split()) if found else ""
+    if not context:
+        return NO_CONTEXT_REPLY
+    return " ".join(SENTENCE_RE.split(context)[:ANSWER_SENTENCES])
+
+
+def token_ids(text):
+    return [zlib.crc32(word.encode("utf-8")) % 32000 for word in text.split()]
+
+
+def common_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        # Same liveness answer as Ollama
+        self._send(200, "Ollama is running", "text/plain")
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self._send(404, json.dumps({"error": "not found"}))
+            return
+
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = request.get("prompt", "")
+        if not prompt:
+            # Preload request
+            self._send(200, json.dumps({"model": request.get("model"), "response": "", "done": True}))
+            return
+
+        options = request.get("options") or {}
+        prompt_ids = list(request.get("context") or []) + token_ids(request.get("system", "")) + token_ids(prompt)
+        server = self.server
+        with server.lock:
+            cached = common_prefix(server.last_prompt, prompt_ids)
+            server.last_prompt = prompt_ids
+
+        words = stub_answer(prompt).split()
+        if options.get("num_predict", -1) > 0:
+            words = words[:options["num_predict"]]
+        for stop in options.get("stop") or []:
+            text = " ".join(words)
+            if stop in text:
+                words = text[:text.index(stop)].split()
+
+        # Like Ollama, nothing (not even headers) is sent before the first
+        # token, and a client that hangs up meanwhile drops the request
+        with server.lock:
+            server.running += 1
+            server.peak_running = max(server.peak_running, server.running)
+        try:
+            if self._wait_first_token(server.first_token_delay):
+                self._stream_words(request, words, prompt_ids, cached)
+        finally:
+            with server.lock:
+                server.running -= 1
+
+    def _client_gone(self):
+        readable, _, _ = select.select([self.connection], [], [], 0)
+        if not readable:
+            return False
+        try:
+            return self.connection.recv(1, socket.MSG_PEEK) == b""
+        except OSError:
+            return True
+
+    def _wait_first_token(self, delay):
+        end = time.perf_counter() + delay
+        while time.perf_counter() < end:
+            if self._client_gone():
+                self.close_connection = True
+                return False
+            time.sleep(min(0.02, max(end - time.perf_counter(), 0)))
+        return True
+
+    def _stream_words(self, request, words, prompt_ids, cached):
+        server = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(message):
+            data = (json.dumps(message) + "\n").encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        try:
+            for i, word in enumerate(words):
+                if i:
+                    time.sleep(1 / server.tokens_per_second)
+                chunk({"model": request.get("model"), "response": (" " if i else "") + word, "done": False})
+            chunk({
+                "model": request.get("model"),
+                "response": "",
+                "done": True,
+                "context": prompt_ids + token_ids(" ".join(words)),
+                "prompt_eval_count": len(prompt_ids) - cached,
+                "eval_count": len(words),
+            })
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled; stop "generating" like Ollama does
+            self.close_connection = True
+
+
+def start_stub_server(port=0, tokens_per_second=50.0, first_token_delay=0.0, host="127.0.0.1"):
+    """Serves the stub in a daemon thread → server (its port: server.server_port)."""
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.tokens_per_second = tokens_per_second
+    server.first_token_delay = first_token_delay
+    server.last_prompt = []
+    server.lock = threading.Lock()
+    # Requests being answered now, and the most at once (for tests)
+    server.running = 0
+    server.peak_running = 0
+    threading.Thread(target=server.serve_forever, name="vetbot-llm-stub", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--first-token-delay", type=float, default=0.0, help="seconds before the first token")
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port, args.tokens_per_second, args.first_token_delay, args.host)
+    print(f"🧪 Stub LLM on http://{args.host}:{server.server_port} ({args.tokens_per_second:g} tokens/s)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,13 +1,26 @@
 import os
-import pandas as pd
+import re
+import json
+import shutil
+import time
+import hashlib
+import itertools
+from collections import deque
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
 from langchain_community.document_loaders import (
     PyPDFLoader,
-    TextLoader,
-    CSVLoader
+    TextLoader
 )
-from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from .clinics import read_table, row_texts, row_metadata
+from .embed_cache import EmbeddingCache, CachedEmbeddings
+from .embeddings import get_embedding_model, embedding_fingerprint
+from .vector_index import FlatIndex
+from .lexical import BM25Index
 
 # ---------------------------------------------------------
 # PATHS
@@ -15,32 +28,204 @@ from langchain_community.embeddings import HuggingFaceEmbeddings
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 VECTOR_DIR = os.path.join(BASE_DIR, "vectorstore")
+MANIFEST_PATH = os.path.join(VECTOR_DIR, "manifest.json")
+FLAT_INDEX_DIR = os.path.join(VECTOR_DIR, "flat")
+LEXICAL_INDEX_PATH = os.path.join(VECTOR_DIR, "bm25.json")
+
+# "chroma" → Chroma DB, "flat" → built-in memory-mapped NumPy index
+VECTOR_BACKEND = os.environ.get("VETBOT_VECTOR_BACKEND", "chroma")
 
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md", ".csv")
 
 # ---------------------------------------------------------
-# LOAD DOCUMENTS FROM /data/
+# PARALLEL LOADING SETTINGS
+# ---------------------------------------------------------
+# 0 or 1 = load serially in this process (the default, also for the app's
+# startup sync); `python -m backend.preprocessor --workers N` fans out
+LOAD_WORKERS = int(os.environ.get("VETBOT_LOAD_WORKERS", "1"))
+# Large PDFs are split into page ranges of this size, one task per range
+PDF_PAGES_PER_TASK = int(os.environ.get("VETBOT_PDF_PAGES_PER_TASK", "40"))
+
+# ---------------------------------------------------------
+# STREAMING PIPELINE SETTINGS
 # ---------------------------------------------------------
-def load_documents():
+# Chunks embedded + upserted together; bounds peak memory of a build
+EMBED_BATCH_SIZE = int(os.environ.get("VETBOT_EMBED_BATCH_SIZE", "64"))
+
+
+# ---------------------------------------------------------
+# LOAD A SINGLE FILE
+# ---------------------------------------------------------
+def load_file(fpath):
+    file = os.path.basename(fpath)
+
+    if file.endswith(".pdf"):
+        return PyPDFLoader(fpath).load()
+
+    if file.endswith(".txt") or file.endswith(".md"):
+        return TextLoader(fpath, encoding="utf-8").load()
+
+    if file.endswith(".csv"):
+        return load_csv_documents(fpath)
+
+    return []
+
+
+def load_csv_documents(fpath):
+    """
+    One compact Document per CSV row (e.g. a clinic or doctor), with the
+    row's typed columns as metadata.
+    """
+    df = read_table(fpath)
+    texts = row_texts(df)
+
     docs = []
+    for i, (text, meta) in enumerate(zip(texts, row_metadata(df))):
+        if not text:
+            continue
+        meta = {col: val for col, val in meta.items() if col not in ("source", "row")}
+        docs.append(Document(page_content=text, metadata={"source": fpath, "row": i, **meta}))
+
+    return docs
+
+
+def lazy_load_file(fpath):
+    # PDFs are yielded page by page instead of being loaded whole
+    if fpath.endswith(".pdf"):
+        yield from PyPDFLoader(fpath).lazy_load()
+    else:
+        yield from load_file(fpath)
+
 
+# ---------------------------------------------------------
+# LOAD DOCUMENTS FROM /data/
+# ---------------------------------------------------------
+def list_data_files():
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
 
-    for file in os.listdir(DATA_DIR):
+    return sorted(
+        file for file in os.listdir(DATA_DIR)
+        if file.endswith(SUPPORTED_EXTENSIONS)
+    )
+
+
+# ---------------------------------------------------------
+# PARALLEL LOADING (PROCESS POOL)
+# ---------------------------------------------------------
+def _load_pdf_pages(fpath, start, end):
+    """
+    Loads pages [start, end) of a PDF with the same text extraction and
+    metadata PyPDFLoader produces when it loads the whole file.
+    """
+    from pypdf import PdfReader
+
+    # PyPDFLoader's file-level metadata, taken from its (lazy) first page
+    template = next(PyPDFLoader(fpath).lazy_load()).metadata
+    reader = PdfReader(fpath)
+    # page_labels is recomputed for the whole file on every access
+    labels = reader.page_labels if "page_label" in template else None
+
+    docs = []
+    for i in range(start, end):
+        metadata = {**template, "page": i}
+        if labels is not None:
+            metadata["page_label"] = labels[i]
+        text = reader.pages[i].extract_text(extraction_mode="plain").strip()
+        docs.append(Document(page_content=text, metadata=metadata))
+
+    return docs
+
+
+def _pdf_page_count(fpath):
+    from pypdf import PdfReader
+    return len(PdfReader(fpath).pages)
+
+
+def _run_load_task(task):
+    fpath, start, end = task
+    if start is None:
+        return load_file(fpath)
+    return _load_pdf_pages(fpath, start, end)
+
+
+def _plan_load_tasks(files):
+    """
+    One task per file, except large PDFs which get one task per page range.
+    Returns (file, task) pairs in file/page order.
+    """
+    tasks = []
+    for file in files:
         fpath = os.path.join(DATA_DIR, file)
 
         if file.endswith(".pdf"):
-            loader = PyPDFLoader(fpath)
-            docs.extend(loader.load())
+            pages = _pdf_page_count(fpath)
+            for start in range(0, pages, PDF_PAGES_PER_TASK):
+                tasks.append((file, (fpath, start, min(start + PDF_PAGES_PER_TASK, pages))))
+        else:
+            tasks.append((file, (fpath, None, None)))
+
+    return tasks
+
 
-        elif file.endswith(".txt") or file.endswith(".md"):
-            loader = TextLoader(fpath, encoding="utf-8")
-            docs.extend(loader.load())
+def iter_documents(files, workers=None):
+    """
+    Yields (file, doc) pairs for the given /data/ files in file/page order.
+    With workers > 1 and more than one task, the files, and page ranges
+    of PDFs, are loaded in a process pool; only a small window of tasks
+    is in flight at a time so loaded pages do not pile up ahead of the
+    consumer. Workers are spawned, not forked, since the caller may
+    already run embedding threads.
+    """
+    workers = LOAD_WORKERS if workers is None else workers
+    planned = _plan_load_tasks(files) if workers > 1 and files else []
 
-        elif file.endswith(".csv"):
-            df = pd.read_csv(fpath)
-            text = df.to_string()
-            docs.append({"page_content": text, "metadata": {"source": file}})
+    if len(planned) <= 1:
+        for file in files:
+            for doc in lazy_load_file(os.path.join(DATA_DIR, file)):
+                yield file, doc
+        return
+
+    tasks = iter(planned)
+    context = multiprocessing.get_context("spawn")
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = deque(
+            (file, pool.submit(_run_load_task, task))
+            for file, task in itertools.islice(tasks, workers * 2)
+        )
+
+        while pending:
+            file, future = pending.popleft()
+            docs = future.result()
+
+            # Keep the window full; results are consumed in submission order
+            nxt = next(tasks, None)
+            if nxt is not None:
+                pending.append((nxt[0], pool.submit(_run_load_task, nxt[1])))
+
+            for doc in docs:
+                yield file, doc
+
+
+def load_files(files, workers=None):
+    """
+    Loads the given /data/ files and returns [(file, docs), ...] in the
+    same order as `files`.
+    """
+    loaded = {file: [] for file in files}
+
+    for file, doc in iter_documents(files, workers=workers):
+        loaded[file].append(doc)
+
+    return [(file, loaded[file]) for file in files]
+
+
+def load_documents(workers=None):
+    docs = []
+
+    for _, file_docs in load_files(list_data_files(), workers=workers):
+        docs.extend(file_docs)
 
     return docs
 
@@ -48,71 +233,512 @@ def load_documents():
 # ---------------------------------------------------------
 # CHUNKING LOGIC
 # ---------------------------------------------------------
-def chunk_documents(docs):
-    splitter = RecursiveCharacterTextSplitter(
+def get_text_splitter():
+    return RecursiveCharacterTextSplitter(
         chunk_size=800,
         chunk_overlap=150
     )
 
-    return splitter.split_documents(docs)
+
+def chunk_documents(docs):
+    splitter = get_text_splitter()
+    chunks = []
+
+    for doc in docs:
+        chunks.extend(split_document(doc, splitter))
+
+    return chunks
+
+
+def split_document(doc, splitter):
+    # category_*.txt files have a known layout → split on it
+    file = os.path.basename(doc.metadata.get("source", ""))
+
+    if file.startswith("category_") and file.endswith(".txt"):
+        chunks = split_category_document(doc)
+        if chunks:
+            return chunks
+
+    return splitter.split_documents([doc])
 
 
 # ---------------------------------------------------------
-# CREATE EMBEDDINGS MODEL (LOCAL)
+# STRUCTURE-AWARE CHUNKING (category_*.txt)
 # ---------------------------------------------------------
-def get_embedding_model():
-    print("🔍 Loading MiniLM embeddings (local)...")
-    return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+CATEGORY_RE = re.compile(r"^CATEGORY:\s*(.+)$")
+RULE_RE = re.compile(r"^[=\-]{3,}$")
+DISEASE_RE = re.compile(r"^\d+\.\s+(.+)$")
+VARIANT_RE = re.compile(r"^[A-Z]\.\s+(.+)$")
+SECTION_RE = re.compile(r"^([A-Za-z][^:\-]{0,40}):$")
+
+# A disease whose text fits in this many characters becomes one chunk;
+# longer diseases get one chunk per sub-block (split further, without
+# overlap, only if a single sub-block is still too long).
+MAX_SECTION_CHARS = 1000
+
+
+def split_category_document(doc):
+    """
+    Splits a category_*.txt knowledge file on its own layout:
+    the CATEGORY banner, numbered disease headings (with lettered
+    variants such as "A. Demodectic Mange") and their Symptoms / Cause /
+    Diagnosis / Treatment ... sub-blocks. Emits one chunk per disease, or
+    per sub-block for long diseases, with category, disease and section
+    metadata and no overlap.
+    Returns [] if the text does not follow the layout.
+    """
+    category, disease, parent, section = "", "General", "", "Overview"
+    blocks = []  # (disease, section, lines)
+    lines = []
+
+    def flush():
+        body = "\n".join(lines).strip()
+        if body:
+            blocks.append((disease, section, body))
+        lines.clear()
+
+    for raw in doc.page_content.splitlines():
+        line = raw.strip()
+
+        if RULE_RE.match(line):
+            continue
+
+        m = CATEGORY_RE.match(line)
+        if m:
+            flush()
+            category = m.group(1).strip()
+            continue
+
+        m = DISEASE_RE.match(line)
+        if m:
+            flush()
+            parent = disease = m.group(1).strip()
+            section = "Overview"
+            continue
+
+        m = VARIANT_RE.match(line)
+        if m and parent:
+            flush()
+            disease = f"{parent}: {m.group(1).strip()}"
+            section = "Overview"
+            continue
+
+        m = SECTION_RE.match(line)
+        if m:
+            flush()
+            section = m.group(1).strip()
+            continue
+
+        lines.append(line)
+
+    flush()
+
+    if not parent:
+        return []
+
+    tail_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=MAX_SECTION_CHARS,
+        chunk_overlap=0
+    )
+
+    def make_chunk(disease, section, text):
+        metadata = {
+            **doc.metadata,
+            "category": category,
+            "disease": disease,
+            "section": section,
+        }
+        title = disease if disease != "General" else category
+        return Document(page_content=f"{title}\n{text}", metadata=metadata)
+
+    # Group the sub-blocks by disease, keeping file order
+    diseases = {}
+    for disease, section, body in blocks:
+        diseases.setdefault(disease, []).append((section, body))
+
+    chunks = []
+    for disease, sections in diseases.items():
+        whole = "\n\n".join(f"{section}:\n{body}" for section, body in sections)
+
+        if len(whole) <= MAX_SECTION_CHARS:
+            names = ", ".join(section for section, _ in sections)
+            chunks.append(make_chunk(disease, names, whole))
+            continue
+
+        for section, body in sections:
+            for part in tail_splitter.split_text(body):
+                chunks.append(make_chunk(disease, section, f"{section}:\n{part}"))
+
+    return chunks
 
 
 # ---------------------------------------------------------
-# BUILD VECTOR STORE (CHROMA)
+# STREAMING CHUNKER
+# ---------------------------------------------------------
+def iter_chunks(doc_stream, stats=None):
+    """
+    Splits (file, doc) pairs one document at a time and yields
+    (file, chunk). Every chunk gets a stable ID ("<file>::<n>") in
+    metadata["chunk_id"] so it can later be replaced or removed.
+    """
+    splitter = get_text_splitter()
+    counters = {}
+
+    while True:
+        t0 = time.perf_counter()
+        try:
+            file, doc = next(doc_stream)
+        except StopIteration:
+            return
+        t1 = time.perf_counter()
+
+        chunks = split_document(doc, splitter)
+        t2 = time.perf_counter()
+
+        if stats is not None:
+            stats.add("load", 1, t1 - t0)
+            stats.add("chunk", len(chunks), t2 - t1)
+
+        for chunk in chunks:
+            n = counters.get(file, 0)
+            counters[file] = n + 1
+            chunk.metadata["chunk_id"] = f"{file}::{n}"
+            yield file, chunk
+
+
+def batched(iterable, size):
+    it = iter(iterable)
+    while True:
+        batch = list(itertools.islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+# ---------------------------------------------------------
+# PIPELINE PROGRESS / THROUGHPUT
 # ---------------------------------------------------------
-def build_vectorstore():
-    print("📚 Loading documents...")
-    docs = load_documents()
+class PipelineStats:
+    """Item counts and busy time per pipeline stage."""
+
+    STAGES = ("load", "chunk", "embed", "upsert")
+
+    def __init__(self):
+        self.items = {stage: 0 for stage in self.STAGES}
+        self.seconds = {stage: 0.0 for stage in self.STAGES}
+        self.started = time.perf_counter()
+
+    def add(self, stage, n, seconds):
+        self.items[stage] += n
+        self.seconds[stage] += seconds
+
+    def report(self, prefix="⏱️"):
+        parts = []
+        for stage in self.STAGES:
+            busy = self.seconds[stage]
+            rate = self.items[stage] / busy if busy > 0 else 0.0
+            parts.append(f"{stage} {self.items[stage]} ({rate:.1f}/s)")
+        elapsed = time.perf_counter() - self.started
+        print(f"{prefix} {' | '.join(parts)} | {elapsed:.1f}s elapsed")
+
+
+# ---------------------------------------------------------
+# MANIFEST (per-file content hash + chunk IDs)
+# ---------------------------------------------------------
+def file_hash(fpath):
+    h = hashlib.sha256()
+    with open(fpath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# Bump when chunking changes so existing chunks get rebuilt
+CHUNKER_VERSION = 2
+
 
-    if len(docs) == 0:
+def index_settings():
+    """Settings baked into the stored chunks; a change forces a reindex."""
+    return {
+        "chunker": CHUNKER_VERSION,
+        "embedding": embedding_fingerprint(),
+        "backend": VECTOR_BACKEND,
+        "lexical": 1,
+    }
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {"settings": index_settings(), "files": {}}
+
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    os.makedirs(VECTOR_DIR, exist_ok=True)
+    tmp_path = MANIFEST_PATH + ".tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def index_version(manifest=None):
+    """
+    Short hash of the index settings and every indexed file's content.
+    Changes whenever a sync adds, edits or removes data, so caches built
+    on top of the index can tell when they are stale.
+    """
+    manifest = manifest or load_manifest()
+    state = {
+        "settings": manifest["settings"],
+        "files": {file: entry["hash"] for file, entry in manifest["files"].items()},
+    }
+    return hashlib.sha256(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def diff_data_files(manifest):
+    """
+    Compares /data/ against the manifest.
+    Returns (added, changed, deleted, stats) where stats holds the
+    current hash/size/mtime of every file on disk. If the index settings
+    changed, every known file counts as changed.
+    """
+    known = manifest["files"]
+    stale = manifest.get("settings") != index_settings()
+    added, changed, stats = [], [], {}
+
+    for file in list_data_files():
+        fpath = os.path.join(DATA_DIR, file)
+        st = os.stat(fpath)
+        entry = known.get(file)
+
+        # Same size + mtime → trust the stored hash, skip re-reading the file
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            digest = entry["hash"]
+        else:
+            digest = file_hash(fpath)
+
+        stats[file] = {"hash": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+        if entry is None:
+            added.append(file)
+        elif stale or entry["hash"] != digest:
+            changed.append(file)
+
+    deleted = sorted(file for file in known if file not in stats)
+
+    return added, changed, deleted, stats
+
+
+# ---------------------------------------------------------
+# OPEN THE CONFIGURED VECTOR STORE
+# ---------------------------------------------------------
+def open_vectorstore(embeddings):
+    if VECTOR_BACKEND == "flat":
+        return FlatIndex(FLAT_INDEX_DIR, embedding_function=embeddings)
+
+    if VECTOR_BACKEND == "chroma":
+        return Chroma(
+            persist_directory=VECTOR_DIR,
+            embedding_function=embeddings
+        )
+
+    raise ValueError(f"Unknown VETBOT_VECTOR_BACKEND: {VECTOR_BACKEND}")
+
+
+def recreate_vectorstore(vectordb, embeddings):
+    """
+    Drops every stored vector and returns an empty store. Used when the
+    embedding model changes: the new vectors may have another dimension,
+    which the old Chroma collection / vectors.npy cannot take.
+    """
+    if isinstance(vectordb, FlatIndex):
+        shutil.rmtree(FLAT_INDEX_DIR, ignore_errors=True)
+    else:
+        vectordb.delete_collection()
+    return open_vectorstore(embeddings)
+
+
+# ---------------------------------------------------------
+# SYNC VECTOR STORE WITH /data/ (INCREMENTAL)
+# ---------------------------------------------------------
+def sync_vectorstore(embeddings=None, workers=None):
+    manifest = load_manifest()
+
+    # A vectorstore built before the manifest existed has no chunk IDs,
+    # so it cannot be updated in place → start over once.
+    if os.path.exists(VECTOR_DIR) and not os.path.exists(MANIFEST_PATH):
+        print("⚠ Vectorstore has no manifest. Rebuilding from scratch...")
+        shutil.rmtree(VECTOR_DIR)
+
+    added, changed, deleted, stats = diff_data_files(manifest)
+
+    # Files removed from /data/ still have to leave the index below
+    if not stats and not deleted:
         print("⚠ No documents found in /data/ folder.")
         return None
 
-    print(f"📄 Loaded {len(docs)} documents.")
+    print(f"📚 {len(added)} added, {len(changed)} changed, {len(deleted)} deleted file(s).")
+    new_space = manifest["files"] and manifest["settings"].get("embedding") != embedding_fingerprint()
+    manifest["settings"] = index_settings()
 
-    print("✂️ Chunking documents...")
-    chunks = chunk_documents(docs)
+    embeddings = embeddings or get_embedding_model()
+    vectordb = open_vectorstore(embeddings)
 
-    print(f"🧩 Created {len(chunks)} chunks.")
+    # Every file is re-embedded anyway; start from an empty store
+    if new_space:
+        print("♻️ Embedding model changed. Recreating the vector store...")
+        vectordb = recreate_vectorstore(vectordb, embeddings)
 
-    embeddings = get_embedding_model()
+    if not (added or changed or deleted):
+        if isinstance(vectordb, FlatIndex):
+            vectordb.ensure_codec()
+            vectordb.ensure_ann()
+        return vectordb
 
-    print("🧠 Creating Chroma Vector DB...")
-    vectordb = Chroma.from_documents(
-        chunks,
-        embedding=embeddings,
-        persist_directory=VECTOR_DIR
-    )
+    lexical = BM25Index(LEXICAL_INDEX_PATH)
+
+    # Remove stale chunks first (changed files get re-added below)
+    for file in changed + deleted:
+        old_ids = manifest["files"][file]["chunk_ids"]
+        if old_ids:
+            if not new_space:
+                vectordb.delete(ids=old_ids)
+            lexical.delete(old_ids)
+        del manifest["files"][file]
+        save_manifest(manifest)
+        print(f"🗑️ Removed {len(old_ids)} chunks of {file}")
+
+    # Only text the cache has never seen goes through the model
+    cache = EmbeddingCache(embedding_fingerprint())
+    try:
+        upsert_files(vectordb, CachedEmbeddings(embeddings, cache), added + changed, manifest, stats, lexical, workers)
+    finally:
+        cache.save()
+        lexical.save()
+    print(f"💾 Embedding cache: {cache.hits} hits, {cache.misses} misses.")
 
     vectordb.persist()
-    print("✅ Vector DB created & saved!")
+    if isinstance(vectordb, FlatIndex):
+        vectordb.ensure_codec()
+        vectordb.ensure_ann()
+    print("✅ Vector DB updated & saved!")
 
+    if not stats:
+        print("⚠ No documents found in /data/ folder.")
+        return None
     return vectordb
 
 
+# ---------------------------------------------------------
+# STREAMING LOAD → CHUNK → EMBED → UPSERT
+# ---------------------------------------------------------
+def upsert_files(vectordb, embeddings, files, manifest, file_stats, lexical=None, workers=None):
+    """
+    Streams the given files through load → chunk → embed → upsert in
+    batches of EMBED_BATCH_SIZE chunks, so only one batch is held in
+    memory at a time. A file's manifest entry is written once all of
+    its chunks are in the vector DB. Chunks are also added to the BM25
+    index when one is given.
+    """
+    stats = PipelineStats()
+    chunk_ids = {file: [] for file in files}
+    finished = set()
+
+    def finish(file):
+        manifest["files"][file] = {**file_stats[file], "chunk_ids": chunk_ids[file]}
+        finished.add(file)
+        print(f"🧩 Indexed {file}: {len(chunk_ids[file])} chunks.")
+
+    chunks = iter_chunks(iter_documents(files, workers), stats=stats)
+    # FlatIndex takes upserts directly; Chroma via its collection
+    target = vectordb._collection if isinstance(vectordb, Chroma) else vectordb
+
+    for batch in batched(chunks, EMBED_BATCH_SIZE):
+        texts = [chunk.page_content for _, chunk in batch]
+        ids = [chunk.metadata["chunk_id"] for _, chunk in batch]
+
+        t0 = time.perf_counter()
+        vectors = embeddings.embed_documents(texts)
+        t1 = time.perf_counter()
+
+        metadatas = [chunk.metadata for _, chunk in batch]
+        target.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=texts,
+            metadatas=metadatas
+        )
+        if lexical is not None:
+            lexical.add(ids, texts, metadatas)
+        # The batch's vectors go to disk now, not at persist()
+        if isinstance(target, FlatIndex):
+            target.flush()
+        t2 = time.perf_counter()
+
+        stats.add("embed", len(batch), t1 - t0)
+        stats.add("upsert", len(batch), t2 - t1)
+
+        for file, chunk in batch:
+            chunk_ids[file].append(chunk.metadata["chunk_id"])
+
+        # Files come in order: everything before the batch's last file is complete
+        last_file = batch[-1][0]
+        for file in files:
+            if file == last_file:
+                break
+            if file not in finished:
+                finish(file)
+        save_manifest(manifest)
+
+        stats.report()
+
+    for file in files:
+        if file not in finished:
+            finish(file)
+    save_manifest(manifest)
+
+
+# ---------------------------------------------------------
+# BUILD VECTOR STORE (CHROMA)
+# ---------------------------------------------------------
+def build_vectorstore(rebuild=False, embeddings=None, workers=None):
+    """
+    Brings the vector DB in line with /data/. Only added, changed or
+    deleted files are re-chunked and re-embedded; rebuild=True drops
+    the existing DB and embeds the whole corpus again.
+    """
+    if rebuild and os.path.exists(VECTOR_DIR):
+        print("♻️ Dropping existing vector DB...")
+        shutil.rmtree(VECTOR_DIR)
+
+    return sync_vectorstore(embeddings, workers)
+
+
 # ---------------------------------------------------------
 # LOAD EXISTING VECTOR DB
 # ---------------------------------------------------------
-def load_vectorstore():
+def load_vectorstore(embeddings=None):
     if not os.path.exists(VECTOR_DIR):
         print("⚠ Vectorstore not found. Building new one...")
-        return build_vectorstore()
+        return build_vectorstore(embeddings=embeddings)
 
     print("🔄 Loading existing vector DB...")
-    embeddings = get_embedding_model()
-
-    vectordb = Chroma(
-        persist_directory=VECTOR_DIR,
-        embedding_function=embeddings
-    )
+    vectordb = sync_vectorstore(embeddings)
 
     print("✅ Vectorstore loaded!")
     return vectordb
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build / update the VetBot vector DB from /data/")
+    parser.add_argument("--rebuild", action="store_true", help="drop the DB and embed everything again")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("VETBOT_LOAD_WORKERS", os.cpu_count() or 1)),
+                        help="processes loading /data/ (default: VETBOT_LOAD_WORKERS or the CPU count, 1 = serial)")
+    args = parser.parse_args()
+    build_vectorstore(rebuild=args.rebuild, workers=args.workers)
@@ -0,0 +1,118 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+
+# ---------------------------------------------------------
+# QUERY EMBEDDING CACHE SETTINGS
+# ---------------------------------------------------------
+QUERY_CACHE_SIZE = int(os.environ.get("VETBOT_QUERY_CACHE_SIZE", "1024"))
+
+SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(text):
+    # MiniLM is uncased, so case and spacing never change the vector
+    return SPACE_RE.sub(" ", text).strip().lower().rstrip("?!. ")
+
+
+# ---------------------------------------------------------
+# IN-MEMORY LRU CACHE
+# ---------------------------------------------------------
+class QueryEmbeddingCache:
+    """
+    Bounded LRU of normalized question → query vector, shared by every
+    component that embeds the question. Entries belong to one embedding
+    fingerprint; a lookup with a different fingerprint clears the cache.
+    """
+
+    def __init__(self, max_entries=QUERY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.fingerprint = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Streamlit serves sessions from several threads
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _check_fingerprint(self, fingerprint):
+        if fingerprint != self.fingerprint:
+            self.entries.clear()
+            self.fingerprint = fingerprint
+
+    def get(self, key, fingerprint):
+        with self.lock:
+            self._check_fingerprint(fingerprint)
+            vector = self.entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key, vector, fingerprint):
+        with self.lock:
+            self._check_fingerprint(fingerprint)
+            self.entries[key] = vector
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+query_cache = QueryEmbeddingCache()
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """Wraps an embeddings model; query embeddings go through the LRU cache."""
+
+    def __init__(self, embeddings, fingerprint, cache=query_cache):
+        self.embeddings = embeddings
+        self.fingerprint = fingerprint
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        key = normalize_query(text)
+        vector = self.cache.get(key, self.fingerprint)
+        if vector is None:
+            # Embed the normalized text so a cached vector never depends
+            # on which spelling of the question arrived first
+            vector = self.embeddings.embed_query(key or text)
+            self.cache.put(key, vector, self.fingerprint)
+        return vector
+
+    def embed_queries(self, texts):
+        """embed_query() for many questions; misses go to the model in one batch."""
+        keys = [normalize_query(text) for text in texts]
+        vectors = [self.cache.get(key, self.fingerprint) for key in keys]
+        missing = sorted({key for key, vector in zip(keys, vectors) if vector is None})
+
+        if missing:
+            # Same model call as embed_query for MiniLM (no query prefix)
+            found = dict(zip(missing, self.embeddings.embed_documents(missing)))
+            for key, vector in found.items():
+                self.cache.put(key, vector, self.fingerprint)
+            vectors = [found[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+
+        return vectors
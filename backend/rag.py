@@ -1,39 +1,72 @@
 import os
-from datetime import datetime
+import asyncio
+import threading
+from contextlib import aclosing
+
+from .preprocessor import load_vectorstore, index_version, LEXICAL_INDEX_PATH, VECTOR_DIR
+from .lexical import BM25Index
+from .retrieval import build_retriever, get_embeddings
+from .context import pack_context
+from .query_cache import CachedQueryEmbeddings
+from .embeddings import get_embedding_model, embedding_fingerprint
+from .answer_cache import AnswerCache, ANSWER_CACHE
+from .clinics import answer_clinic_query
+from .router import canned_reply, route, REPLIES
+from .topic_gate import load_topic_gate, TOPIC_GATE
+from .conversation import resolve_follow_up, format_history
+from .llm import create_backend, LLMSession
+from .slo import Deadline, BudgetExceeded, astream_within, stream_within
+from .extractive import extractive_answer
+from .scheduler import llm_scheduler, SchedulerBusy
+from .resources import registry
+# History lives in backend/history.py; re-exported for older imports
+from .history import save_chat_history, load_chat_history
 
-from langchain_community.llms import Ollama
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
 
-from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import RunnableParallel, RunnableSequence
-from langchain_core.output_parsers import StrOutputParser
+# ---------------------------------------------
+# Shared resources (one per server process)
+# ---------------------------------------------
+# Chunks retrieved per question; pack_context trims them to the token budget
+RETRIEVAL_K = int(os.environ.get("VETBOT_RETRIEVAL_K", "4"))
 
-from .preprocessor import load_vectorstore
-from .db import get_db_connection
+# Nothing is loaded at import time; each getter builds on first use
+get_embedding_model = registry.register("embedding_model", get_embedding_model)
 
+get_vectordb = registry.register("vectordb", lambda: load_vectorstore(get_embedding_model()))
 
-# ---------------------------------------------
-# Load local model (Ollama)
-# ---------------------------------------------
-def load_local_llm():
-    return Ollama(model="phi3:mini")
+# Repeated questions reuse their query vector (LRU, cleared on model change)
+get_query_embeddings = registry.register(
+    "query_embeddings",
+    lambda: CachedQueryEmbeddings(get_embeddings(get_vectordb()), embedding_fingerprint())
+)
 
+# BM25 + dense (reciprocal rank fusion) when the lexical index exists
+get_retriever = registry.register("retriever", lambda: build_retriever(
+    get_vectordb(), BM25Index(LEXICAL_INDEX_PATH), k=RETRIEVAL_K, embeddings=get_query_embeddings()
+))
 
 
-# ---------------------------------------------
-# Load Vector Store
-# ---------------------------------------------
-vectordb = load_vectorstore()
-retriever = vectordb.as_retriever(search_kwargs={"k": 2})
+# Near-identical questions reuse a stored answer until the index changes
+def build_answer_cache():
+    get_vectordb()  # loading the store may reindex, which changes the version
+    return AnswerCache(index_version())
+
+
+get_answer_cache = registry.register("answer_cache", build_answer_cache)
+
+# Veterinary vs off-topic centroids, saved next to the index
+get_topic_gate = registry.register("topic_gate", lambda: load_topic_gate(
+    get_vectordb(), get_query_embeddings(), embedding_fingerprint(), index_version(), VECTOR_DIR
+))
 
 
 # ---------------------------------------------------------
 # RAG PROMPT
 # ---------------------------------------------------------
 
-template = """
-You are VETBOT — an offline veterinary assistant trained to give calm, friendly and helpful guidance for pet owners.
+# Static instructions, sent as Ollama's system prompt: identical on every
+# request, so their KV cache is reused instead of prefilled each time
+SYSTEM_PROMPT = """You are VETBOT — an offline veterinary assistant trained to give calm, friendly and helpful guidance for pet owners.
 
 RULES:
 1. Only answer questions related to:
@@ -67,6 +100,11 @@ RULES:
 
 6. Do NOT add jokes, personal stories, or unnecessary friendliness.
 7. Do NOT mention page numbers, document names, or sources. Only give the answer.
+"""
+
+# Everything that changes per question comes after the system prompt
+template = """Recent conversation:
+{history}
 
 Context:
 {context}
@@ -75,137 +113,332 @@ Question:
 {question}
 
 VetBot Answer:
-
 """
 
+# A turn continuing an LLMSession: earlier turns are already in its tokens
+follow_up_template = """Context:
+{context}
 
+Question:
+{question}
 
+VetBot Answer:
+"""
 
 
-prompt = PromptTemplate(
-    template=template,
-    input_variables=["context", "question"]
-)
-
-
+# The model sometimes writes the next turn itself; cut it off there
+STOP_SEQUENCES = ["\nQuestion:", "\nContext:", "\nUser:", "\nRecent conversation:", "<|end|>", "<|user|>"]
 
 
-# ---------------------------------------------
-# Build RAG Pipeline (New Runnable format)
-# ---------------------------------------------
-def build_rag_chain():
-    llm = load_local_llm()
+def load_local_llm():
+    # Ollama, in-process llama.cpp or the stub server (backend/llm.py)
+    return create_backend(SYSTEM_PROMPT, stop=STOP_SEQUENCES)
 
-    def build_inputs(question):
-        return {
-            "context": retriever.invoke(question),
-            "question": question
-        }
 
-    chain = (
-        build_inputs
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
+get_llm = registry.register("llm", load_local_llm)
 
-    return chain
 
-rag_chain = build_rag_chain()
+def preload_llm():
+    """Loads the LLM now (Ollama: keeps it resident for keep_alive)."""
+    get_llm().preload()
 
 
 # ---------------------------------------------
-# Get RAG Response
-# ---------------------------------------------
+# Build RAG prompt
 # ---------------------------------------------
-# Get RAG Response (with HARD FILTER)
-# ---------------------------------------------
-def get_rag_response(user_question: str):
-
-    greetings = ["hi", "hello", "hey", "hii", "yo"]
-    
-    if user_question.lower().strip() in greetings:
-        return ("Hi! How can I help with your pet today?", [])
+def retrieve(search_query, query_vector=None):
+    """(docs, query_vector); the vector stays None when the keyword shortcut answered."""
+    return get_retriever().search(search_query, query_vector)
+
+
+def build_inputs(inputs):
+    """Packs the retrieved docs into the context → {history, context, question, docs}."""
+    # The query vector from prepare_query() or retrieval (None after the
+    # keyword shortcut) is reused to rank context sections
+    search_query = inputs.get("search_query") or inputs["question"]
+    docs = inputs.get("docs")
+    query_vector = inputs.get("query_vector")
+    if docs is None:
+        docs, query_vector = retrieve(search_query, query_vector)
+    context = pack_context(docs, search_query, query_vector, get_query_embeddings())
+    return {
+        "history": inputs.get("history") or "(none)",
+        "context": context,
+        "question": inputs["question"],
+        # Kept for the extractive fallback
+        "docs": docs,
+    }
+
+
+def build_prompt(inputs, session=None):
+    """The per-question prompt text (the system prompt is sent separately)."""
+    if session is not None and session.usable():
+        return follow_up_template.format(context=inputs["context"], question=inputs["question"])
+    return template.format(**inputs)
+
+
+def fallback_reply(inputs, packed, info):
+    """Extractive answer from the retrieved chunks when the LLM is too slow."""
+    info["fallback"] = True
+    print(f"⏱️ Latency budget spent, answering from the documents: {inputs['search_query']!r}")
+    return extractive_answer(inputs["search_query"], packed["docs"], packed["context"])
+
+
+def report_prefill(info):
+    if "prompt_tokens" in info:
+        print(
+            f"🧮 Prefill: {info['prefill_tokens']}/{info['prompt_tokens']} prompt tokens evaluated, "
+            f"{info['prefill_saved']} reused from cache"
+        )
 
 
+# ---------------------------------------------
+# Fast replies (HARD FILTER, no LLM)
+# ---------------------------------------------
+def fast_reply(user_question: str):
+    """Canned / lookup answer for questions that never reach the LLM, else None."""
     # ---------------------------------------------------
-    # 1. TOPIC CLASSIFIER → Reject if NOT a pet question
+    # 1. EXACT CLINIC / DOCTOR LOOKUP (no embedding, no LLM)
     # ---------------------------------------------------
-    pet_keywords = [
-        "dog", "dogs", "cat", "cats", "kitten", "puppy",
-        "parrot", "bird", "rabbit", "hamster", "pet",
-        "animal", "vet", "veterinary", "clinic", "hi","hello"
-    ]
-
-    # If NONE of these words appear → instantly reject
-    if not any(word in user_question.lower() for word in pet_keywords):
-        return ("This question is not related to pets or veterinary topics, so I cannot answer it.", [])
+    # Before the router: "phone number of Blue Cross" is a clinic
+    # question even though "phone" is an off-topic term
+    reply = answer_clinic_query(user_question)
+    if reply:
+        return reply
 
     # ---------------------------------------------------
-    # 2. HARD FILTER (Extra safety for random topics)
+    # 2. SMALL TALK + OFF-TOPIC (compiled intent router)
     # ---------------------------------------------------
-    non_pet_keywords = [
-        "capital", "president", "math", "country", "physics", "chemistry",
-        "france", "india", "pasta", "recipe", "human", "brain", "history",
-        "computer", "technology", "mobile", "actor", "movie"
-    ]
+    return canned_reply(user_question)
 
-    if any(word in user_question.lower() for word in non_pet_keywords):
-        return ("This question is not related to pets or veterinary topics, so I cannot answer it.", [])
 
-    # ---------------------------------------------------
-    # 3. POLITE ENDING HANDLER
-    # ---------------------------------------------------
-    polite_words = ["ok", "okay", "thanks", "thank you", "done", "ok done"]
+# ---------------------------------------------
+# Query vector: topic gate + answer cache
+# ---------------------------------------------
+def prepare_query(question: str, search_query: str, info: dict):
+    """
+    Runs the embedding topic gate on the question as the user asked it
+    (only when the keyword router could not place it; entities added by
+    resolve_follow_up must not make an off-topic question look like a
+    pet one). Nothing is embedded otherwise, so retrieval can still take
+    its keyword shortcut.
+    Returns (query_vector of search_query or None, early reply or None).
+    """
+    if not (TOPIC_GATE and route(question) == "unknown"):
+        return None, None
+
+    question_vector = get_query_embeddings().embed_query(question)
+    on_topic, info["topic_score"] = get_topic_gate().check(question_vector)
+    if not on_topic:
+        info["off_topic"] = True
+        return None, REPLIES["off_topic"]
+
+    # The gate's vector is the retrieval vector when nothing was resolved
+    return (question_vector if search_query == question else None), None
+
+
+def cached_answer(search_query: str, query_vector, info: dict):
+    """
+    Answer cache lookup after retrieval: by similarity when a query
+    vector exists, by the exact (normalized) question when the keyword
+    shortcut skipped the embedding.
+    """
+    if not ANSWER_CACHE:
+        return None
+    cache = get_answer_cache()
+    if query_vector is None:
+        answer, info["similarity"] = cache.lookup_text(search_query)
+    else:
+        answer, info["similarity"] = cache.lookup(query_vector)
+    if answer is not None:
+        info["cache_hit"] = True
+    return answer
+
+
+def store_answer(search_query: str, query_vector, answer: str):
+    # Embedded here only if retrieval never needed the vector
+    if query_vector is None:
+        query_vector = get_query_embeddings().embed_query(search_query)
+    get_answer_cache().store(search_query, query_vector, answer)
+
+
+def rag_inputs(user_question, history, info):
+    """
+    Chain inputs for a question in a conversation: retrieval gets the
+    question rewritten to stand alone, the prompt gets the question as
+    asked plus a bounded block of recent turns.
+    """
+    search_query = resolve_follow_up(user_question, history)
+    if search_query != user_question:
+        info["search_query"] = search_query
+    return {"question": user_question, "search_query": search_query, "history": format_history(history)}
 
-    if any(user_question.lower().strip() == w for w in polite_words):
-        return ("I'm glad I could help. Take good care of your pet, and feel free to ask if you need anything else.", [])
 
-    # ---------------------------------------------------
-    # 4. NORMAL RAG MODEL CALL
-    # ---------------------------------------------------
+# ---------------------------------------------
+# Stream RAG Response
+# ---------------------------------------------
+def stream_rag_response(user_question: str, info: dict = None, history=None, session: LLMSession = None):
+    """
+    Yields the answer piece by piece as the LLM produces it.
+    Fast replies, topic gate rejections and answer cache hits arrive as
+    a single piece. Pass a dict as `info` to get cache_hit / similarity /
+    topic_score / prefill_saved filled in. `history` is the chat so far as
+    [(role, message), ...] with role "user" or "bot", oldest first;
+    `session` is the chat's LLMSession (Ollama context reuse).
+    Past the latency budget the LLM is cancelled: with nothing written
+    yet the answer is extracted from the retrieved chunks instead
+    (info["fallback"]), otherwise it ends there (info["truncated"]).
+    """
+    info = {} if info is None else info
+    info["cache_hit"] = False
+    deadline = Deadline()
+
+    answer = fast_reply(user_question)
+    if answer:
+        yield answer
+        return
+
+    inputs = rag_inputs(user_question, history, info)
+    pieces = []
     try:
-        answer = rag_chain.invoke(user_question).strip()
-        return answer, []
+        query_vector, early_reply = prepare_query(user_question, inputs["search_query"], info)
+        if early_reply:
+            yield early_reply
+            return
+
+        docs, query_vector = retrieve(inputs["search_query"], query_vector)
+        answer = cached_answer(inputs["search_query"], query_vector, info)
+        if answer is not None:
+            yield answer
+            return
+
+        packed = build_inputs({**inputs, "docs": docs, "query_vector": query_vector})
+        prompt_text = build_prompt(packed, session)
+        cancel = threading.Event()
+        generation = get_llm().stream(prompt_text, session, info, cancel)
+        for piece in stream_within(generation, deadline, info, cancel):
+            # Leading whitespace from the model is dropped, like .strip() did
+            if not pieces:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+            pieces.append(piece)
+            yield piece
+    except BudgetExceeded:
+        yield fallback_reply(inputs, packed, info)
+        return
     except Exception as e:
-        return (f"Error: {e}", [])
+        yield f"\n\nError: {e}" if pieces else f"Error: {e}"
+        return
 
+    report_prefill(info)
 
+    # Only complete answers are cached
+    answer = "".join(pieces).strip()
+    if ANSWER_CACHE and answer and not info.get("truncated"):
+        store_answer(inputs["search_query"], query_vector, answer)
 
 
 # ---------------------------------------------
-# Save chat history
+# Get RAG Response
 # ---------------------------------------------
-def save_chat_history(user_id: int, question: str, answer: str):
-    conn = get_db_connection()
-    cur = conn.cursor()
-
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    cur.execute("""
-        INSERT INTO history (user_id, question, answer, timestamp)
-        VALUES (?, ?, ?, ?)
-    """, (user_id, question, answer, timestamp))
-
-    conn.commit()
-    conn.close()
+def get_rag_response(user_question: str, with_info: bool = False, history=None, session: LLMSession = None):
+    """
+    Returns (answer, sources), or (answer, sources, info) with
+    with_info=True; info["cache_hit"] tells if the answer came from
+    the semantic answer cache instead of the LLM.
+    """
+    info = {}
+    answer = "".join(stream_rag_response(user_question, info, history, session)).strip()
+    return (answer, [], info) if with_info else (answer, [])
 
 
 # ---------------------------------------------
-# Load chat history
+# Async RAG API (bounded, per-user fair LLM queue)
 # ---------------------------------------------
-def load_chat_history(user_id: int):
-    conn = get_db_connection()
-    cur = conn.cursor()
+BUSY_REPLY = "VetBot is busy answering other pet owners right now. Please try again in a moment."
+
+
+async def astream_rag_response(user_question: str, user_id=None, info: dict = None, history=None,
+                               session: LLMSession = None):
+    """
+    Async stream_rag_response(). LLM calls wait for a slot in the shared
+    llm_scheduler (info["queue_wait"] = seconds waited); when the queue
+    is full the busy reply is returned at once (info["rejected"]).
+    Fast replies, topic gate rejections and cache hits never queue.
+    The latency budget covers the queue wait too (see stream_rag_response).
+    """
+    info = {} if info is None else info
+    info.update(cache_hit=False, queue_wait=0.0)
+    deadline = Deadline()
+
+    answer = fast_reply(user_question)
+    if answer:
+        yield answer
+        return
+
+    inputs = rag_inputs(user_question, history, info)
+    pieces = []
+    try:
+        # Embedding (and first-use model loading) stays off the event loop
+        query_vector, early_reply = await asyncio.to_thread(prepare_query, user_question, inputs["search_query"], info)
+        if early_reply:
+            yield early_reply
+            return
+
+        # Retrieval happens before queueing; only generation holds a slot
+        docs, query_vector = await asyncio.to_thread(retrieve, inputs["search_query"], query_vector)
+        answer = await asyncio.to_thread(cached_answer, inputs["search_query"], query_vector, info)
+        if answer is not None:
+            yield answer
+            return
+
+        packed = await asyncio.to_thread(build_inputs, {**inputs, "docs": docs, "query_vector": query_vector})
+        prompt_text = build_prompt(packed, session)
+
+        async def generation():
+            async with llm_scheduler.slot(user_id) as queue_wait:
+                info["queue_wait"] = queue_wait
+                finished = asyncio.get_running_loop().create_future()
+                try:
+                    async with aclosing(get_llm().astream(prompt_text, session, info, finished=finished)) as pieces:
+                        async for piece in pieces:
+                            yield piece
+                finally:
+                    # Cut short by the deadline: the slot stays taken until the
+                    # LLM has really stopped, so LLM_CONCURRENCY still holds
+                    if not finished.done():
+                        llm_scheduler.hold(finished)
+
+        async for piece in astream_within(generation(), deadline, info):
+            if not pieces:
+                piece = piece.lstrip()
+                if not piece:
+                    continue
+            pieces.append(piece)
+            yield piece
+    except SchedulerBusy:
+        info["rejected"] = True
+        yield BUSY_REPLY
+        return
+    except BudgetExceeded:
+        yield fallback_reply(inputs, packed, info)
+        return
+    except Exception as e:
+        yield f"\n\nError: {e}" if pieces else f"Error: {e}"
+        return
+
+    report_prefill(info)
 
-    cur.execute("""
-        SELECT question, answer, timestamp
-        FROM history
-        WHERE user_id = ?
-        ORDER BY id DESC
-    """, (user_id,))
+    answer = "".join(pieces).strip()
+    if ANSWER_CACHE and answer and not info.get("truncated"):
+        await asyncio.to_thread(store_answer, inputs["search_query"], query_vector, answer)
 
-    rows = cur.fetchall()
-    conn.close()
 
-    return rows
\ No newline at end of file
+async def aget_rag_response(user_question: str, user_id=None, with_info: bool = False, history=None,
+                            session: LLMSession = None):
+    """Async get_rag_response(); info also carries queue_wait / rejected."""
+    info = {}
+    pieces = [piece async for piece in astream_rag_response(user_question, user_id, info, history, session)]
+    answer = "".join(pieces).strip()
+    return (answer, [], info) if with_info else (answer, [])
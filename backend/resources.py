@@ -0,0 +1,119 @@
+import sys
+import time
+import threading
+
+# ---------------------------------------------------------
+# PROCESS-WIDE RESOURCE REGISTRY
+# ---------------------------------------------------------
+class ResourceRegistry:
+    """
+    Holds exactly one instance of each heavy resource (embedding model,
+    vector index, LLM client, ...) per server process. Resources are
+    registered by name with a zero-argument builder and built on first
+    use, once, even when several sessions ask at the same time.
+    """
+
+    def __init__(self):
+        self.builders = {}
+        self.values = {}
+        self.errors = {}
+        self.locks = {}
+        self.guard = threading.Lock()
+        # Set once warmup has loaded the embedding model and the index
+        self.ready = threading.Event()
+        self.warmup_status = {}
+        self.warmup_thread = None
+
+    def register(self, name, builder):
+        """Registers `builder` under `name` → getter function for it."""
+        with self.guard:
+            self.builders[name] = builder
+            self.locks.setdefault(name, threading.Lock())
+        return lambda: self.get(name)
+
+    def get(self, name):
+        if name in self.values:
+            return self.values[name]
+
+        with self.locks[name]:
+            if name not in self.values:
+                try:
+                    self.values[name] = self.builders[name]()
+                except Exception as e:
+                    self.errors[name] = f"{type(e).__name__}: {e}"
+                    raise
+                self.errors.pop(name, None)
+        return self.values[name]
+
+    def is_loaded(self, name):
+        return name in self.values
+
+    def status(self):
+        """name → "ready" / "not loaded" / error text, for every resource."""
+        return {
+            name: "ready" if name in self.values else self.errors.get(name, "not loaded")
+            for name in self.builders
+        }
+
+
+# Streamlit's file watcher can re-import backend modules; anchoring the
+# registry on `sys` keeps one set of resources for the whole process.
+registry = getattr(sys, "_vetbot_registry", None) or ResourceRegistry()
+sys._vetbot_registry = registry
+
+
+# ---------------------------------------------------------
+# STARTUP WARMUP
+# ---------------------------------------------------------
+def warmup():
+    """
+    Loads everything the first question needs: a dummy embed and
+    retrieval (model + index in memory), then asks Ollama to load
+    the LLM and keep it resident. Progress goes to warmup_status.
+    """
+    from .rag import get_query_embeddings, get_retriever, get_topic_gate, preload_llm
+
+    status = registry.warmup_status
+    steps = [
+        ("embeddings", lambda: get_query_embeddings().embed_query("my dog is vomiting")),
+        ("index", lambda: get_retriever().search("my dog is vomiting")),
+        ("topic_gate", get_topic_gate),
+    ]
+
+    for name, step in steps:
+        status[name] = "loading"
+        t0 = time.perf_counter()
+        try:
+            step()
+            status[name] = f"ready ({time.perf_counter() - t0:.1f}s)"
+        except Exception as e:
+            status[name] = f"failed: {e}"
+            print(f"⚠ Warmup {name} failed: {e}")
+            return
+
+    # Questions can be answered from here on, even if the LLM is still loading
+    registry.ready.set()
+
+    status["llm"] = "loading"
+    t0 = time.perf_counter()
+    try:
+        preload_llm()
+        status["llm"] = f"ready ({time.perf_counter() - t0:.1f}s)"
+    except Exception as e:
+        status["llm"] = f"failed: {e}"
+        print(f"⚠ Could not preload the LLM: {e}")
+
+    print(f"🔥 Warmup done: {status}")
+
+
+def start_warmup():
+    """Starts warmup() in a background thread, once per process."""
+    with registry.guard:
+        if registry.warmup_thread is None:
+            registry.warmup_thread = threading.Thread(target=warmup, name="vetbot-warmup", daemon=True)
+            registry.warmup_thread.start()
+    return registry.warmup_thread
+
+
+def is_ready():
+    return registry.ready.is_set()
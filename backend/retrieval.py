@@ -0,0 +1,166 @@
+import os
+from typing import Any, List
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+# ---------------------------------------------------------
+# HYBRID RETRIEVAL SETTINGS
+# ---------------------------------------------------------
+HYBRID_RETRIEVAL = os.environ.get("VETBOT_HYBRID_RETRIEVAL", "1") == "1"
+# Candidates taken from each side before fusion
+HYBRID_CANDIDATES = int(os.environ.get("VETBOT_HYBRID_CANDIDATES", "10"))
+RRF_K = int(os.environ.get("VETBOT_RRF_K", "60"))
+
+# Pure keyword queries ("parvo", "ivermectin dose") skip the embedding
+# when every term is in the index and the lexical winner is clear.
+LEXICAL_MAX_TERMS = int(os.environ.get("VETBOT_LEXICAL_MAX_TERMS", "3"))
+LEXICAL_CONFIDENCE_RATIO = float(os.environ.get("VETBOT_LEXICAL_CONFIDENCE_RATIO", "1.5"))
+
+
+def dense_search(vectordb, query_vector, k):
+    """Top-k documents for a precomputed query vector (Chroma or FlatIndex)."""
+    if hasattr(vectordb, "similarity_search_by_vector"):
+        return vectordb.similarity_search_by_vector(query_vector, k=k)
+    return [doc for doc, _ in vectordb.search(query_vector, k)]
+
+
+def dense_search_batch(vectordb, query_vectors, k):
+    """dense_search() for many query vectors in one vectorized call."""
+    if hasattr(vectordb, "search_batch"):
+        return [[doc for doc, _ in hits] for hits in vectordb.search_batch(query_vectors, k)]
+
+    # Chroma: one query() call for the whole batch
+    result = vectordb._collection.query(
+        query_embeddings=[list(map(float, v)) for v in query_vectors],
+        n_results=k,
+        include=["documents", "metadatas"],
+    )
+    return [
+        [Document(page_content=text, metadata=meta or {}) for text, meta in zip(texts, metas)]
+        for texts, metas in zip(result["documents"], result["metadatas"])
+    ]
+
+
+def get_embeddings(vectordb):
+    # Chroma exposes .embeddings, FlatIndex .embedding_function
+    return getattr(vectordb, "embeddings", None) or vectordb.embedding_function
+
+
+def doc_key(doc):
+    # chunk_id is set by the preprocessor; older chunks fall back to text
+    return doc.metadata.get("chunk_id") or doc.page_content
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """rankings: lists of keys, best first → keys sorted by fused score."""
+    scores = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda key: -scores[key])
+
+
+# ---------------------------------------------------------
+# DENSE RETRIEVER
+# ---------------------------------------------------------
+class DenseRetriever(BaseRetriever):
+    """
+    Embedding search that can reuse a query vector computed elsewhere.
+    search() returns (docs, query_vector) so later stages (context
+    packing) do not embed the question again.
+    """
+
+    vectordb: Any
+    embeddings: Any
+    k: int = 2
+
+    def search(self, query, query_vector=None):
+        if query_vector is None:
+            query_vector = self.embeddings.embed_query(query)
+        return dense_search(self.vectordb, query_vector, self.k), query_vector
+
+    def search_batch(self, queries, query_vectors):
+        """One vectorized search for many questions → list of doc lists."""
+        return dense_search_batch(self.vectordb, query_vectors, self.k)
+
+    def _get_relevant_documents(self, query, *, run_manager=None) -> List[Document]:
+        return self.search(query)[0]
+
+
+# ---------------------------------------------------------
+# HYBRID BM25 + DENSE RETRIEVER
+# ---------------------------------------------------------
+class HybridRetriever(BaseRetriever):
+    """
+    Fuses a BM25 ranking with a dense ranking using reciprocal rank
+    fusion. search() returns (docs, query_vector); the vector is None
+    when a confident keyword query skipped the embedding.
+    """
+
+    vectordb: Any
+    embeddings: Any
+    lexical: Any
+    k: int = 2
+    candidates: int = HYBRID_CANDIDATES
+
+    def lexical_docs(self, hits):
+        docs = []
+        for chunk_id, _ in hits:
+            text, meta = self.lexical.document(chunk_id)
+            docs.append(Document(page_content=text, metadata=meta))
+        return docs
+
+    def lexical_is_confident(self, query, hits):
+        terms, known = self.lexical.known_terms(query)
+        if terms == 0 or terms > LEXICAL_MAX_TERMS or known < terms or not hits:
+            return False
+        if len(hits) <= self.k:
+            return True
+        return hits[0][1] >= LEXICAL_CONFIDENCE_RATIO * hits[self.k][1]
+
+    def search(self, query, query_vector=None):
+        hits = self.lexical.search(query, self.candidates)
+
+        if query_vector is None and self.lexical_is_confident(query, hits):
+            return self.lexical_docs(hits[: self.k]), None
+
+        if query_vector is None:
+            query_vector = self.embeddings.embed_query(query)
+        dense_docs = dense_search(self.vectordb, query_vector, self.candidates)
+
+        return self.fuse(hits, dense_docs), query_vector
+
+    def fuse(self, hits, dense_docs):
+        by_key = {doc_key(doc): doc for doc in self.lexical_docs(hits)}
+        by_key.update({doc_key(doc): doc for doc in dense_docs})
+
+        fused = reciprocal_rank_fusion([
+            [doc_key(doc) for doc in dense_docs],
+            [chunk_id for chunk_id, _ in hits],
+        ])
+
+        return [by_key[key] for key in fused[: self.k]]
+
+    def search_batch(self, queries, query_vectors):
+        """
+        Many questions at once: one vectorized dense search for all of
+        them, then per-question BM25 and fusion (no lexical shortcut,
+        since every vector is already computed).
+        """
+        dense = dense_search_batch(self.vectordb, query_vectors, self.candidates)
+        return [
+            self.fuse(self.lexical.search(query, self.candidates), dense_docs)
+            for query, dense_docs in zip(queries, dense)
+        ]
+
+    def _get_relevant_documents(self, query, *, run_manager=None) -> List[Document]:
+        return self.search(query)[0]
+
+
+def build_retriever(vectordb, lexical=None, k=2, embeddings=None):
+    """Hybrid retriever when a BM25 index is available, dense otherwise."""
+    embeddings = embeddings or get_embeddings(vectordb)
+    if HYBRID_RETRIEVAL and lexical is not None and len(lexical):
+        return HybridRetriever(vectordb=vectordb, embeddings=embeddings, lexical=lexical, k=k)
+    return DenseRetriever(vectordb=vectordb, embeddings=embeddings, k=k)
@@ -0,0 +1,223 @@
+"""
+Rule-based intent router for chat messages; no embedding, no LLM.
+
+    python -m backend.router            # self-check against router_corpus.jsonl
+
+route(text) returns one of:
+    greeting / goodbye / help   – small talk only (canned reply)
+    off_topic                   – non-pet subject and no pet/vet term
+    pet                         – mentions a pet, a vet topic or a symptom
+    unknown                     – none of the above (left to retrieval)
+"""
+import os
+import re
+import json
+
+# ---------------------------------------------------------
+# VOCABULARY (lowercase; multi-word entries are phrases)
+# ---------------------------------------------------------
+GREETING_TERMS = ["hi", "hii", "hai", "hello", "hey", "heya", "yo", "hola", "namaste",
+                  "good morning", "good afternoon", "good evening"]
+
+GOODBYE_TERMS = ["bye", "goodbye", "good bye", "see you", "thanks", "thank you", "thankyou", "thx",
+                 "ok", "okay", "done", "ok done", "cool", "great", "got it", "that's all", "thats all"]
+
+HELP_TERMS = ["help", "help me", "need help", "what can you do", "how does this work"]
+
+# Words that may surround small talk without making it a question
+FILLER_TERMS = ["there", "vetbot", "bot", "so", "much", "very", "a", "lot", "again", "please",
+                "you", "all", "i", "me", "need", "can", "some", "and", "for", "the", "your", "now", "sir",
+                "madam", "doc", "buddy", "friend", "bro"]
+
+ANIMAL_TERMS = [
+    "pet", "dog", "puppy", "pup", "doggy", "canine", "cat", "kitten", "kitty", "feline",
+    "bird", "parrot", "budgie", "cockatiel", "canary", "avian", "rabbit", "bunny", "hamster",
+    "guinea pig", "gerbil", "ferret", "turtle", "tortoise", "goldfish", "aquarium", "lizard",
+    "gecko", "horse", "pony", "cow", "calf", "goat", "sheep", "chicken", "hen", "duck",
+    "animal", "breed", "labrador", "beagle", "pug", "persian", "stray",
+]
+
+CARE_TERMS = [
+    "vet", "vets", "veterinary", "veterinarian", "clinic", "vaccine", "vaccination",
+    "vaccinated", "deworm", "deworming", "dewormer", "neuter", "neutered", "spay", "spayed",
+    "kennel", "litter", "litter box", "leash", "collar", "paw", "fur", "shedding", "grooming",
+    "kibble", "pet food", "treats", "flea collar",
+]
+
+# Conditions from the knowledge base
+CONDITION_TERMS = [
+    "parvo", "parvovirus", "distemper", "rabies", "leptospirosis", "fip", "cat flu",
+    "kennel cough", "bordetella", "flea", "tick", "mange", "ringworm", "mite", "ear mites",
+    "hot spot", "pyoderma", "dermatitis", "heartworm", "worm", "helminth", "heatstroke",
+    "seizure", "fits", "poisoning", "poisoned", "choking", "snake bite", "fracture",
+    "urinary blockage", "vomit", "vomiting", "vomited", "diarrhea", "diarrhoea", "gastritis",
+    "constipation", "pancreatitis", "pneumonia", "asthma", "bronchitis", "tracheal collapse",
+    "pleural effusion", "nasal mites", "lethargic", "limping", "itching", "itchy", "scratching",
+    "sneezing", "not eating", "loss of appetite", "hairball", "bloat", "tapeworm",
+]
+
+PET_TERMS = ANIMAL_TERMS + CARE_TERMS + CONDITION_TERMS
+
+OFF_TOPIC_TERMS = [
+    "capital", "president", "prime minister", "election", "politics", "math", "algebra",
+    "equation", "country", "physics", "chemistry", "france", "india", "pasta", "recipe",
+    "human anatomy", "human brain", "history", "computer", "laptop", "technology", "mobile",
+    "phone", "smartphone", "actor", "actress", "movie", "film", "song", "cricket", "football",
+    "stock", "bitcoin", "crypto", "weather", "programming", "python code", "javascript",
+    "machine learning", "homework", "essay",
+]
+
+SMALL_TALK_PRIORITY = ["help", "goodbye", "greeting"]
+
+# ---------------------------------------------------------
+# CANNED REPLIES (shared by the RAG API and the chat page)
+# ---------------------------------------------------------
+REPLIES = {
+    "greeting": "Hi! How can I help with your pet today? 🐾",
+    "goodbye": "I'm glad I could help. Take good care of your pet — feel free to ask anytime! 🐾",
+    "help": (
+        "I'm here to help 🐾\n\n"
+        "Please tell me what’s happening with your pet — "
+        "for example symptoms, behavior changes, or concerns."
+    ),
+    "off_topic": "This question is not related to pets or veterinary topics, so I cannot answer it.",
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower().replace("’", "'"))
+
+
+# ---------------------------------------------------------
+# COMPILED MATCHER
+# ---------------------------------------------------------
+def compile_terms(groups):
+    """
+    {label: [terms]} → {term tuple: label}. Matching a message is then
+    a dict lookup per word n-gram, so whole words match and nothing
+    inside them ("hi" never matches "this", "ok" never matches "book").
+    """
+    table = {}
+    for label, terms in groups.items():
+        for term in terms:
+            table[tuple(tokenize(term))] = label
+    return table
+
+
+TERM_TABLE = compile_terms({
+    "greeting": GREETING_TERMS,
+    "goodbye": GOODBYE_TERMS,
+    "help": HELP_TERMS,
+    "pet": PET_TERMS,
+    "off_topic": OFF_TOPIC_TERMS,
+})
+# Animals and conditions, for picking entities out of earlier turns
+ENTITY_TABLE = compile_terms({"animal": ANIMAL_TERMS, "condition": CONDITION_TERMS})
+FILLER = set(FILLER_TERMS)
+MAX_PHRASE_WORDS = max(len(term) for term in TERM_TABLE)
+
+
+def _lookup(table, gram):
+    """(label, canonical term) for a word n-gram, or None."""
+    candidates = [gram]
+    if gram[-1].endswith("s") and len(gram[-1]) > 3:
+        # Plurals: "dogs" → "dog", "ticks" → "tick"
+        candidates.append(gram[:-1] + (gram[-1][:-1],))
+    if gram[-1].endswith("'s"):
+        candidates.append(gram[:-1] + (gram[-1][:-2],))
+
+    for candidate in candidates:
+        label = table.get(candidate)
+        if label is not None:
+            return label, " ".join(candidate)
+    return None
+
+
+def find_terms(text, table=TERM_TABLE):
+    """
+    [(label, term), ...] in text order plus the words no term covers.
+    Longest phrases win, so "good morning" is one greeting, not two words.
+    """
+    tokens = tokenize(text)
+    found = []
+    covered = [False] * len(tokens)
+
+    i = 0
+    while i < len(tokens):
+        for size in range(min(MAX_PHRASE_WORDS, len(tokens) - i), 0, -1):
+            hit = _lookup(table, tuple(tokens[i:i + size]))
+            if hit is not None:
+                found.append(hit)
+                covered[i:i + size] = [True] * size
+                i += size
+                break
+        else:
+            i += 1
+
+    return found, [t for t, c in zip(tokens, covered) if not c]
+
+
+def match(text):
+    """Labels found in `text` plus the (non-filler) words no term covers."""
+    found, uncovered = find_terms(text)
+    return {label for label, _ in found}, [t for t in uncovered if t not in FILLER]
+
+
+def entities(text):
+    """(animals, conditions) named in `text`, e.g. (["dog"], ["parvo"])."""
+    found, _ = find_terms(text, ENTITY_TABLE)
+    animals = [term for label, term in found if label == "animal"]
+    conditions = [term for label, term in found if label == "condition"]
+    return animals, conditions
+
+
+def route(text):
+    labels, leftover = match(text)
+
+    small_talk = labels & set(SMALL_TALK_PRIORITY)
+    if small_talk and labels <= small_talk and not leftover:
+        return next(intent for intent in SMALL_TALK_PRIORITY if intent in small_talk)
+
+    if "pet" in labels:
+        return "pet"
+    if "off_topic" in labels:
+        return "off_topic"
+    return "unknown"
+
+
+def canned_reply(text):
+    """The fixed reply for small talk / off-topic messages, else None."""
+    return REPLIES.get(route(text))
+
+
+# ---------------------------------------------------------
+# SELF-CHECK AGAINST THE CORPUS
+# ---------------------------------------------------------
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "router_corpus.jsonl")
+
+
+def check_corpus(path=CORPUS_PATH):
+    import time
+
+    with open(path, "r", encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+
+    wrong = [(case, route(case["text"])) for case in cases if route(case["text"]) != case["intent"]]
+    for case, got in wrong:
+        print(f"✗ {case['text']!r}: expected {case['intent']}, got {got}")
+
+    t0 = time.perf_counter()
+    for _ in range(100):
+        for case in cases:
+            route(case["text"])
+    per_call = (time.perf_counter() - t0) / (100 * len(cases)) * 1e6
+
+    print(f"✅ {len(cases) - len(wrong)}/{len(cases)} routed correctly, {per_call:.1f} µs per message")
+    return not wrong
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(0 if check_corpus() else 1)
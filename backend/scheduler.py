@@ -0,0 +1,183 @@
+import os
+import sys
+import time
+import queue
+import asyncio
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+
+# ---------------------------------------------------------
+# LLM SCHEDULER SETTINGS
+# ---------------------------------------------------------
+# One phi3 generation at a time is what a CPU Ollama serves best
+LLM_CONCURRENCY = int(os.environ.get("VETBOT_LLM_CONCURRENCY", "1"))
+# Waiting LLM jobs (all users) before new ones are turned away
+LLM_QUEUE_LIMIT = int(os.environ.get("VETBOT_LLM_QUEUE_LIMIT", "16"))
+
+
+class SchedulerBusy(RuntimeError):
+    """Raised instead of queuing when the LLM queue is full."""
+
+
+# ---------------------------------------------------------
+# FAIR PER-USER QUEUE
+# ---------------------------------------------------------
+class FairScheduler:
+    """
+    Limits concurrent LLM calls and hands free slots to waiting users
+    round-robin, so one user sending many questions cannot starve the
+    others. Each user's own jobs keep their order. Not thread-safe:
+    use it only from the shared event loop below.
+    """
+
+    def __init__(self, max_concurrent=LLM_CONCURRENCY, max_queue=LLM_QUEUE_LIMIT):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.active = 0
+        self.queued = 0
+        self.waiting = {}     # user → deque of futures
+        self.turns = deque()  # users with waiting jobs, next first
+
+    @asynccontextmanager
+    async def slot(self, user_id=None):
+        """
+        async with scheduler.slot(user_id) as queue_wait: ...
+        queue_wait is the seconds spent waiting for the slot.
+        """
+        start = time.perf_counter()
+
+        if self.active < self.max_concurrent and not self.queued:
+            self.active += 1
+        else:
+            if self.queued >= self.max_queue:
+                raise SchedulerBusy(f"{self.queued} LLM jobs already waiting")
+            await self._wait_turn(user_id)
+
+        try:
+            yield time.perf_counter() - start
+        finally:
+            self.active -= 1
+            self._dispatch()
+
+    def hold(self, done):
+        """
+        Keeps one more slot busy until the asyncio future `done` completes,
+        for work that outlives the `async with slot()` that started it
+        (a cancelled LLM request Ollama has not dropped yet).
+        """
+        self.active += 1
+
+        def release(_):
+            self.active -= 1
+            self._dispatch()
+
+        done.add_done_callback(release)
+
+    async def _wait_turn(self, user_id):
+        ticket = asyncio.get_running_loop().create_future()
+        if user_id not in self.waiting:
+            self.waiting[user_id] = deque()
+            self.turns.append(user_id)
+        self.waiting[user_id].append(ticket)
+        self.queued += 1
+
+        try:
+            await ticket
+        except asyncio.CancelledError:
+            if ticket.done() and not ticket.cancelled():
+                # Slot was granted just as the caller gave up
+                self.active -= 1
+                self._dispatch()
+            else:
+                self._forget(user_id, ticket)
+            raise
+
+    def _forget(self, user_id, ticket):
+        jobs = self.waiting.get(user_id)
+        if jobs and ticket in jobs:
+            jobs.remove(ticket)
+            self.queued -= 1
+            if not jobs:
+                del self.waiting[user_id]
+                self.turns.remove(user_id)
+
+    def _dispatch(self):
+        while self.active < self.max_concurrent and self.turns:
+            user_id = self.turns.popleft()
+            jobs = self.waiting[user_id]
+            ticket = jobs.popleft()
+            self.queued -= 1
+
+            # Back of the line if this user still has jobs waiting
+            if jobs:
+                self.turns.append(user_id)
+            else:
+                del self.waiting[user_id]
+
+            if not ticket.done():
+                self.active += 1
+                ticket.set_result(None)
+
+    def stats(self):
+        return {"active": self.active, "queued": self.queued, "users_waiting": len(self.waiting)}
+
+
+# ---------------------------------------------------------
+# SHARED EVENT LOOP (for sync callers such as Streamlit)
+# ---------------------------------------------------------
+# Anchored on `sys` like the resource registry: a re-imported module
+# must keep using the running loop, not start a second one
+_shared = getattr(sys, "_vetbot_llm_loop", None) or {"loop": None, "lock": threading.Lock()}
+sys._vetbot_llm_loop = _shared
+
+
+def get_loop():
+    """Background event loop shared by all sessions; started on first use."""
+    with _shared["lock"]:
+        if _shared["loop"] is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="vetbot-llm-loop", daemon=True).start()
+            _shared["loop"] = loop
+    return _shared["loop"]
+
+
+def run_sync(coro):
+    """Runs a coroutine on the shared loop and waits for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+def iterate_sync(agen):
+    """
+    Consumes an async generator on the shared loop, yielding its items
+    to a sync caller. Stopping early cancels the generator, which frees
+    its LLM slot.
+    """
+    items = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put(item)
+        except Exception as e:
+            items.put(e)
+        items.put(done)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_loop())
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        future.cancel()
+
+
+# One scheduler per process, so a module reload cannot double LLM_CONCURRENCY
+# or orphan the jobs queued in the old one
+llm_scheduler = getattr(sys, "_vetbot_llm_scheduler", None) or FairScheduler()
+sys._vetbot_llm_scheduler = llm_scheduler
@@ -0,0 +1,103 @@
+import os
+import time
+import queue
+import asyncio
+import threading
+
+# ---------------------------------------------------------
+# LATENCY SLO SETTINGS
+# ---------------------------------------------------------
+# Seconds from question to finished answer (queue wait, retrieval and
+# generation); past it the LLM is cancelled. 0 = no budget
+LATENCY_BUDGET = float(os.environ.get("VETBOT_LATENCY_BUDGET", "30"))
+
+
+class BudgetExceeded(TimeoutError):
+    """The LLM produced nothing before the deadline."""
+
+
+class Deadline:
+    """Start time + budget of one request."""
+
+    def __init__(self, budget=LATENCY_BUDGET):
+        self.start = time.perf_counter()
+        self.budget = budget
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def remaining(self):
+        """Seconds left, or None without a budget."""
+        if self.budget <= 0:
+            return None
+        return max(self.budget - self.elapsed(), 0.0)
+
+
+# ---------------------------------------------------------
+# STREAM UNDER A DEADLINE
+# ---------------------------------------------------------
+async def astream_within(pieces, deadline, info):
+    """
+    Re-yields the async iterator `pieces` until `deadline`. If nothing
+    arrived by then, raises BudgetExceeded; if the answer is already
+    streaming, it ends there (info["truncated"]). Either way `pieces`
+    is closed, which cancels the generation behind it.
+    """
+    iterator = pieces.__aiter__()
+    started = False
+    try:
+        while True:
+            try:
+                piece = await asyncio.wait_for(iterator.__anext__(), deadline.remaining())
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                if not started:
+                    raise BudgetExceeded(f"no answer within {deadline.budget:g}s")
+                info["truncated"] = True
+                yield " …"
+                return
+            started = True
+            yield piece
+    finally:
+        await iterator.aclose()
+
+
+def stream_within(pieces, deadline, info, cancel):
+    """
+    Sync astream_within(): `pieces` is consumed in a worker thread and
+    `cancel` (the threading.Event the LLM stream watches) is set once
+    the deadline passes or the caller stops early.
+    """
+    items = queue.Queue()
+    done = object()
+
+    def worker():
+        try:
+            for piece in pieces:
+                items.put(piece)
+        except Exception as e:
+            items.put(e)
+        finally:
+            items.put(done)
+
+    threading.Thread(target=worker, name="vetbot-slo", daemon=True).start()
+    started = False
+    try:
+        while True:
+            try:
+                item = items.get(timeout=deadline.remaining())
+            except queue.Empty:
+                if not started:
+                    raise BudgetExceeded(f"no answer within {deadline.budget:g}s")
+                info["truncated"] = True
+                yield " …"
+                return
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            started = True
+            yield item
+    finally:
+        cancel.set()
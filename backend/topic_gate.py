@@ -0,0 +1,123 @@
+import os
+import hashlib
+import numpy as np
+
+# ---------------------------------------------------------
+# TOPIC GATE SETTINGS
+# ---------------------------------------------------------
+TOPIC_GATE = os.environ.get("VETBOT_TOPIC_GATE", "1") == "1"
+# Rejected when the off-topic centroid beats the veterinary one by more
+# than this (cosine); raise it if real pet questions get rejected
+TOPIC_GATE_MARGIN = float(os.environ.get("VETBOT_TOPIC_GATE_MARGIN", "0.05"))
+
+TOPIC_GATE_FILE = "topic_gate.npz"
+
+# Examples of what VetBot should not answer; their mean is the off-topic centroid
+OFF_TOPIC_EXAMPLES = [
+    "What is the capital of France?",
+    "Who won the last presidential election?",
+    "Solve this quadratic equation for x.",
+    "Explain Newton's laws of motion.",
+    "Give me a recipe for pasta carbonara.",
+    "How do I bake chocolate chip cookies?",
+    "Which smartphone has the best camera?",
+    "How do I fix my laptop that won't turn on?",
+    "Write a Python function to sort a list.",
+    "Recommend a good movie to watch tonight.",
+    "Who is the best actor in Hollywood?",
+    "What are the lyrics of this song?",
+    "Who won the cricket world cup?",
+    "What is the football score today?",
+    "Should I buy bitcoin or stocks?",
+    "How do I file my income tax return?",
+    "What's the weather forecast for tomorrow?",
+    "Plan a three-day trip to Paris for me.",
+    "Summarize the causes of World War II.",
+    "Help me write an essay about climate change.",
+    "I have a headache, which painkiller should I take?",
+    "What are the symptoms of diabetes in humans?",
+    "How can I lose weight fast?",
+    "How do I learn to play the guitar?",
+    "Translate this sentence into Spanish.",
+    "What is the meaning of life?",
+    "Tell me a joke.",
+    "How do I apply for a passport?",
+]
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+def corpus_vectors(vectordb):
+    """All stored chunk vectors of a FlatIndex or Chroma store."""
+    if hasattr(vectordb, "vectors"):
+        return np.asarray(vectordb.vectors, dtype=np.float32)
+    embeddings = vectordb._collection.get(include=["embeddings"])["embeddings"]
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+# ---------------------------------------------------------
+# CENTROID CLASSIFIER
+# ---------------------------------------------------------
+class TopicGate:
+    """
+    Compares a query vector with two precomputed centroids: the mean of
+    all indexed chunks (veterinary) and the mean of OFF_TOPIC_EXAMPLES.
+    Reuses the query vector retrieval needs anyway, so a check is two
+    dot products.
+    """
+
+    def __init__(self, pet_centroid, off_topic_centroid, margin=TOPIC_GATE_MARGIN):
+        self.pet_centroid = _unit(pet_centroid)
+        self.off_topic_centroid = _unit(off_topic_centroid)
+        self.margin = margin
+
+    def score(self, query_vector):
+        """> 0 when the query is closer to the corpus than to the off-topic examples."""
+        query = _unit(query_vector)
+        return float(query @ self.pet_centroid - query @ self.off_topic_centroid)
+
+    def check(self, query_vector):
+        """(on_topic, score)"""
+        score = self.score(query_vector)
+        return score >= -self.margin, score
+
+    @classmethod
+    def build(cls, vectordb, embeddings):
+        vectors = corpus_vectors(vectordb)
+        if vectors.size == 0:
+            raise ValueError("Cannot build the topic gate from an empty vector store")
+        pet_centroid = (vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)).mean(axis=0)
+
+        examples = np.asarray(embeddings.embed_documents(OFF_TOPIC_EXAMPLES), dtype=np.float32)
+        off_topic_centroid = (examples / np.linalg.norm(examples, axis=1, keepdims=True)).mean(axis=0)
+
+        return cls(pet_centroid, off_topic_centroid)
+
+
+def _stamp(fingerprint, version):
+    # Centroids depend on the model, the indexed corpus and the examples
+    examples = hashlib.sha256("\n".join(OFF_TOPIC_EXAMPLES).encode("utf-8")).hexdigest()[:16]
+    return f"{fingerprint}|{version}|{examples}"
+
+
+def load_topic_gate(vectordb, embeddings, fingerprint, version, vector_dir):
+    """Loads the saved centroids when they match, else rebuilds and saves them."""
+    path = os.path.join(vector_dir, TOPIC_GATE_FILE)
+    stamp = _stamp(fingerprint, version)
+
+    if os.path.exists(path):
+        data = np.load(path)
+        if str(data["stamp"]) == stamp:
+            return TopicGate(data["pet"], data["off_topic"])
+
+    print("🧭 Building topic gate centroids...")
+    gate = TopicGate.build(vectordb, embeddings)
+
+    os.makedirs(vector_dir, exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, pet=gate.pet_centroid, off_topic=gate.off_topic_centroid, stamp=stamp)
+    os.replace(tmp_path, path)
+    return gate
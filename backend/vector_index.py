@@ -0,0 +1,625 @@
+import os
+import json
+import numpy as np
+from typing import Any, List
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from .doc_store import DocStore
+
+
+# ---------------------------------------------------------
+# ANN SETTINGS
+# ---------------------------------------------------------
+# "exact" → brute force over all vectors, "ivf" or "hnsw" → approximate
+INDEX_MODE = os.environ.get("VETBOT_INDEX_MODE", "exact")
+
+# IVF: number of k-means lists (0 = sqrt(N)) and lists scanned per query
+IVF_NLIST = int(os.environ.get("VETBOT_IVF_NLIST", "0"))
+IVF_NPROBE = int(os.environ.get("VETBOT_IVF_NPROBE", "8"))
+
+# HNSW (needs `pip install hnswlib`)
+HNSW_M = int(os.environ.get("VETBOT_HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.environ.get("VETBOT_HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.environ.get("VETBOT_HNSW_EF_SEARCH", "64"))
+
+
+# ---------------------------------------------------------
+# COMPRESSED STORAGE SETTINGS
+# ---------------------------------------------------------
+# Search matrix precision: float32 (no compression), float16, or int8
+# with a per-dimension scale. vectors.npy always keeps float32 for
+# re-scoring and rebuilds; it is only read for candidate rows.
+STORAGE_DTYPE = os.environ.get("VETBOT_STORAGE_DTYPE", "float32")
+# Project to this many PCA dimensions before quantizing (0 = off)
+PCA_DIM = int(os.environ.get("VETBOT_PCA_DIM", "0"))
+# Re-score the top k * factor compressed hits in float32 (0 = off)
+RESCORE_FACTOR = int(os.environ.get("VETBOT_RESCORE_FACTOR", "4"))
+
+
+def ann_params(mode=None):
+    mode = mode or INDEX_MODE
+    if mode == "ivf":
+        return {"nlist": IVF_NLIST, "nprobe": IVF_NPROBE}
+    if mode == "hnsw":
+        return {"m": HNSW_M, "ef_construction": HNSW_EF_CONSTRUCTION, "ef_search": HNSW_EF_SEARCH}
+    return {}
+
+
+# ---------------------------------------------------------
+# FLAT (EXACT) VECTOR INDEX ON A MEMORY-MAPPED .npy
+# ---------------------------------------------------------
+class FlatIndex:
+    """
+    Minimal vector store: L2-normalized float32 vectors in vectors.npy
+    (memory-mapped on load), chunk text / metadata in docs.jsonl (read
+    by offset) and chunk ids + offsets in store.json.
+    Search is one matrix-vector product plus argpartition.
+
+    Exposes the subset of the Chroma API the app uses: upsert / delete /
+    persist for the preprocessor and as_retriever for backend/rag.py.
+    flush() moves upserted vectors to disk between batches, so building
+    a large index holds one batch in memory, not the whole corpus.
+    """
+
+    QUERY_BLOCK = 256  # queries scored per matrix product in search_batch
+    COPY_BLOCK = 8192  # rows copied at a time when persist() rewrites vectors.npy
+
+    def __init__(self, index_dir, embedding_function=None):
+        self.index_dir = index_dir
+        self.embedding_function = embedding_function
+        self.vectors_path = os.path.join(index_dir, "vectors.npy")
+        self.store_path = os.path.join(index_dir, "store.json")
+        self.spill_path = os.path.join(index_dir, "pending.f32")
+        self.docs = DocStore(os.path.join(index_dir, "docs.jsonl"))
+
+        self.ids, self.offsets = [], []
+        self.vectors = None
+        self._pending = []      # upserted vectors not flushed to pending.f32 yet
+        self._spilled = 0       # rows in pending.f32, merged into vectors.npy by persist()
+        self._dim = 0
+        self._deleted = set()   # row numbers to drop on the next persist
+        self.ann = None         # IVFIndex / HNSWIndex over the persisted rows
+        self.codec = None       # VectorCodec for the compressed search matrix
+        self.codes = None
+        self.rescore_factor = RESCORE_FACTOR
+
+        if os.path.exists(self.store_path) and os.path.exists(self.vectors_path):
+            with open(self.store_path, "r", encoding="utf-8") as f:
+                store = json.load(f)
+            self.ids, self.offsets = store["ids"], store["offsets"]
+            self.vectors = np.load(self.vectors_path, mmap_mode="r")
+
+        # Rows flushed by an interrupted build never reached store.json
+        if os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+        self.rows = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+        self.ann = load_ann(index_dir, len(self.ids))
+        self.codec, self.codes = load_codec(index_dir, len(self.ids))
+
+    def __len__(self):
+        return len(self.rows)
+
+    # -----------------------------------------------------
+    # WRITE PATH
+    # -----------------------------------------------------
+    def upsert(self, ids, embeddings, documents, metadatas):
+        vectors = normalize(np.asarray(embeddings, dtype=np.float32))
+        offsets = self.docs.append(zip(documents, metadatas))
+
+        for chunk_id, offset in zip(ids, offsets):
+            if chunk_id in self.rows:
+                self._deleted.add(self.rows[chunk_id])
+            self.rows[chunk_id] = len(self.ids)
+            self.ids.append(chunk_id)
+            self.offsets.append(offset)
+
+        self._pending.append(vectors)
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            row = self.rows.pop(chunk_id, None)
+            if row is not None:
+                self._deleted.add(row)
+
+    def flush(self):
+        """Appends the upserted vectors to pending.f32 and frees them."""
+        if not self._pending:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self.spill_path, "ab") as f:
+            for vectors in self._pending:
+                f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                self._spilled += vectors.shape[0]
+                self._dim = vectors.shape[1]
+        self._pending = []
+
+    def _compact(self):
+        # Search only sees upserts / deletes once they are persisted
+        if self._pending or self._spilled or self._deleted:
+            self.persist()
+
+    def _write_store(self):
+        tmp_store = self.store_path + ".tmp"
+        with open(tmp_store, "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids, "offsets": self.offsets}, f)
+        os.replace(tmp_store, self.store_path)
+
+    def persist(self):
+        """
+        Merges the flushed rows into vectors.npy and drops deleted rows,
+        COPY_BLOCK rows at a time from the memory-mapped files.
+        """
+        self.flush()
+        os.makedirs(self.index_dir, exist_ok=True)
+        if not self._spilled and not self._deleted and os.path.exists(self.store_path):
+            return
+
+        old = self.vectors if self.vectors is not None and self.vectors.size else None
+        n_old = 0 if old is None else old.shape[0]
+        spill = None
+        if self._spilled:
+            spill = np.memmap(self.spill_path, dtype=np.float32, mode="r", shape=(self._spilled, self._dim))
+        dim = old.shape[1] if old is not None else self._dim
+
+        keep = np.array([i for i in range(len(self.ids)) if i not in self._deleted], dtype=np.int64)
+        tmp_vectors = self.vectors_path + ".tmp.npy"
+        matrix = np.lib.format.open_memmap(tmp_vectors, mode="w+", dtype=np.float32, shape=(len(keep), dim))
+        for start in range(0, len(keep), self.COPY_BLOCK):
+            rows = keep[start:start + self.COPY_BLOCK]
+            # Rows are sorted: stored ones first, then flushed ones
+            stored = rows[rows < n_old]
+            if len(stored):
+                matrix[start:start + len(stored)] = old[stored]
+            if len(stored) < len(rows):
+                matrix[start + len(stored):start + len(rows)] = spill[rows[len(stored):] - n_old]
+        matrix.flush()
+        del matrix, spill
+
+        if self._deleted:
+            self.ids = [self.ids[i] for i in keep]
+            self.offsets = self.docs.compact([self.offsets[i] for i in keep])
+
+        os.replace(tmp_vectors, self.vectors_path)
+        self._write_store()
+        self.vectors = np.load(self.vectors_path, mmap_mode="r")
+        if os.path.exists(self.spill_path):
+            os.remove(self.spill_path)
+
+        self.rows = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+        self._spilled = 0
+        self._deleted = set()
+        # Row numbers moved → ANN structure and codes no longer match
+        self.ann = None
+        self.codec = self.codes = None
+
+    # -----------------------------------------------------
+    # READ PATH
+    # -----------------------------------------------------
+    def search(self, query_vector, k=4):
+        """Exact top-k by cosine similarity → [(Document, score), ...]."""
+        self._compact()
+        if self.vectors is None or len(self.ids) == 0:
+            return []
+
+        query = normalize(np.asarray(query_vector, dtype=np.float32))
+        return [(self.document(i), score) for i, score in self.search_rows(query, k)]
+
+    def search_rows(self, query, k, exact=False):
+        """
+        Top-k (row, score) pairs for a normalized query vector.
+        exact=True always scans the float32 vectors (ground truth).
+        """
+        if exact:
+            scores = self.vectors @ query
+            return top_k(np.arange(scores.shape[0]), scores, k)
+
+        rescore = self.codec is not None and self.rescore_factor > 0
+        wanted = k * self.rescore_factor if rescore else k
+
+        rows = self.ann.candidates(query, wanted) if self.ann is not None else None
+
+        if self.codec is not None:
+            codes = self.codes if rows is None else self.codes[rows]
+            scores = self.codec.score(codes, self.codec.prepare(query))
+        else:
+            scores = (self.vectors if rows is None else np.asarray(self.vectors[rows])) @ query
+
+        if rows is None:
+            rows = np.arange(scores.shape[0])
+        best = top_k(rows, scores, wanted)
+
+        return self._rescore(best, query, k) if rescore else best[:k]
+
+    def _rescore(self, best, query, k):
+        # Full-precision pass over the few candidates only
+        candidates = np.sort(np.asarray([row for row, _ in best], dtype=np.int64))
+        return top_k(candidates, np.asarray(self.vectors[candidates]) @ query, k)
+
+    def search_batch(self, query_vectors, k=4):
+        """
+        Top-k for many queries at once → one [(Document, score), ...] list
+        per query. Without an ANN structure the whole block of queries is
+        scored in one matrix product; with one, queries go one by one.
+        """
+        self._compact()
+        if self.vectors is None or len(self.ids) == 0:
+            return [[] for _ in query_vectors]
+
+        queries = normalize(np.asarray(query_vectors, dtype=np.float32))
+        if self.ann is not None:
+            hits = [self.search_rows(query, k) for query in queries]
+        else:
+            hits = []
+            for start in range(0, queries.shape[0], self.QUERY_BLOCK):
+                hits.extend(self.search_rows_batch(queries[start:start + self.QUERY_BLOCK], k))
+
+        return [[(self.document(i), score) for i, score in row_hits] for row_hits in hits]
+
+    def search_rows_batch(self, queries, k):
+        """search_rows() for a (n, dim) block of normalized queries, without ANN."""
+        rescore = self.codec is not None and self.rescore_factor > 0
+        wanted = k * self.rescore_factor if rescore else k
+
+        if self.codec is not None:
+            scores = self.codec.score(self.codes, self.codec.prepare(queries).T).T
+        else:
+            scores = (self.vectors @ queries.T).T
+
+        rows = np.arange(scores.shape[1])
+        results = []
+        for query, query_scores in zip(queries, scores):
+            best = top_k(rows, query_scores, wanted)
+            results.append(self._rescore(best, query, k) if rescore else best[:k])
+        return results
+
+    # -----------------------------------------------------
+    # APPROXIMATE NEAREST NEIGHBOURS
+    # -----------------------------------------------------
+    def build_ann(self, mode=None, **params):
+        """(Re)builds and saves the ANN structure for the persisted rows."""
+        mode = mode or INDEX_MODE
+        self.persist()
+
+        if mode == "exact" or len(self.ids) == 0:
+            self.ann = None
+            remove_ann(self.index_dir)
+            return None
+
+        params = {**ann_params(mode), **params}
+        self.ann = ANN_TYPES[mode].build(np.asarray(self.vectors), **params)
+        remove_ann(self.index_dir)
+        self.ann.save(self.index_dir)
+        return self.ann
+
+    def ensure_ann(self, mode=None):
+        """Builds the ANN structure only if it is missing or its settings changed."""
+        mode = mode or INDEX_MODE
+        current = self.ann.describe() if self.ann is not None else {"mode": "exact"}
+        wanted = {"mode": mode, **ann_params(mode)}
+
+        if current != wanted or (mode != "exact" and self.ann.size != len(self.ids)):
+            if mode != "exact":
+                print(f"🧭 Building {mode} index...")
+            self.build_ann(mode)
+
+    # -----------------------------------------------------
+    # COMPRESSED SEARCH MATRIX
+    # -----------------------------------------------------
+    def build_codec(self, dtype=None, pca_dim=None):
+        """(Re)builds and saves codes.npy + codec.npz for the persisted rows."""
+        dtype = dtype or STORAGE_DTYPE
+        pca_dim = PCA_DIM if pca_dim is None else pca_dim
+        self.persist()
+        remove_codec(self.index_dir)
+
+        if (dtype == "float32" and not pca_dim) or len(self.ids) == 0:
+            self.codec = self.codes = None
+            return None
+
+        self.codec, codes = VectorCodec.build(np.asarray(self.vectors), dtype, pca_dim)
+        self.codec.save(self.index_dir, codes)
+        self.codec, self.codes = load_codec(self.index_dir, len(self.ids))
+        return self.codec
+
+    def ensure_codec(self):
+        """Builds the compressed matrix only if it is missing or its settings changed."""
+        current = self.codec.describe() if self.codec is not None else {"dtype": "float32", "pca_dim": 0}
+        wanted = {"dtype": STORAGE_DTYPE, "pca_dim": PCA_DIM}
+
+        if current != wanted or (self.codec is not None and self.codec.size != len(self.ids)):
+            if wanted != {"dtype": "float32", "pca_dim": 0}:
+                print(f"🗜️ Compressing vectors ({STORAGE_DTYPE}, pca={PCA_DIM or 'off'})...")
+            self.build_codec()
+
+    def document(self, row):
+        text, metadata = self.docs.get(self.offsets[row])
+        return Document(page_content=text, metadata=metadata)
+
+    def similarity_search(self, query, k=4):
+        vector = self.embedding_function.embed_query(query)
+        return [doc for doc, _ in self.search(vector, k)]
+
+    def as_retriever(self, search_kwargs=None):
+        k = (search_kwargs or {}).get("k", 4)
+        return FlatIndexRetriever(index=self, k=k)
+
+
+def top_k(rows, scores, k):
+    """Sorts the best k of (rows, scores) → [(row, score), ...]."""
+    k = min(k, scores.shape[0])
+    if k == 0:
+        return []
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best])]
+    return [(int(rows[i]), float(scores[i])) for i in best]
+
+
+def normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+# ---------------------------------------------------------
+# LANGCHAIN RETRIEVER
+# ---------------------------------------------------------
+class FlatIndexRetriever(BaseRetriever):
+    index: Any
+    k: int = 4
+
+    def _get_relevant_documents(self, query, *, run_manager=None) -> List[Document]:
+        return self.index.similarity_search(query, k=self.k)
+
+
+# ---------------------------------------------------------
+# VECTOR COMPRESSION (float16 / int8 / PCA)
+# ---------------------------------------------------------
+class VectorCodec:
+    """
+    Encodes the search matrix as float16, or int8 with a per-dimension
+    scale, optionally after a PCA projection to `pca_dim` dimensions.
+    Scores are approximate inner products; FlatIndex can re-score the
+    best candidates against the float32 vectors.
+    """
+
+    FILE = "codec.npz"
+    CODES = "codes.npy"
+    BLOCK = 4096  # rows decoded to float32 at a time while scoring
+
+    def __init__(self, dtype, pca_dim, mean, components, scale, size):
+        self.dtype = dtype
+        self.pca_dim = pca_dim
+        self.mean = mean              # (dim,) or None
+        self.components = components  # (pca_dim, dim) or None
+        self.scale = scale            # (dim',) for int8, else None
+        self.size = size
+
+    @classmethod
+    def build(cls, vectors, dtype, pca_dim=0):
+        mean = components = scale = None
+        x = vectors
+
+        if pca_dim:
+            mean = vectors.mean(axis=0)
+            _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+            components = vt[:pca_dim].astype(np.float32)
+            x = (vectors - mean) @ components.T
+
+        if dtype == "int8":
+            scale = np.maximum(np.abs(x).max(axis=0), 1e-12).astype(np.float32) / 127.0
+            codes = np.clip(np.round(x / scale), -127, 127).astype(np.int8)
+        elif dtype == "float16":
+            codes = x.astype(np.float16)
+        elif dtype == "float32":
+            codes = x.astype(np.float32)
+        else:
+            raise ValueError(f"Unknown VETBOT_STORAGE_DTYPE: {dtype}")
+
+        return cls(dtype, pca_dim, mean, components, scale, vectors.shape[0]), codes
+
+    def prepare(self, query):
+        """Maps a normalized query into code space (scores = codes @ result)."""
+        q = query @ self.components.T if self.components is not None else query
+        if self.scale is not None:
+            q = q * self.scale
+        return q.astype(np.float32)
+
+    def score(self, codes, q):
+        # q: one prepared query (dim,) or a block of them (dim, n)
+        if codes.dtype == np.float32:
+            return codes @ q
+        out = np.empty(codes.shape[:1] + q.shape[1:], dtype=np.float32)
+        for start in range(0, codes.shape[0], self.BLOCK):
+            out[start:start + self.BLOCK] = codes[start:start + self.BLOCK].astype(np.float32) @ q
+        return out
+
+    def extra_bytes(self):
+        return sum(a.nbytes for a in (self.mean, self.components, self.scale) if a is not None)
+
+    def describe(self):
+        return {"dtype": self.dtype, "pca_dim": self.pca_dim}
+
+    def save(self, index_dir, codes):
+        np.save(os.path.join(index_dir, self.CODES), codes)
+        arrays = {
+            name: value for name, value in
+            (("mean", self.mean), ("components", self.components), ("scale", self.scale))
+            if value is not None
+        }
+        np.savez(
+            os.path.join(index_dir, self.FILE),
+            dtype=self.dtype, pca_dim=self.pca_dim, size=self.size, **arrays
+        )
+
+    @classmethod
+    def load(cls, index_dir):
+        data = np.load(os.path.join(index_dir, cls.FILE))
+        codec = cls(
+            str(data["dtype"]), int(data["pca_dim"]),
+            data["mean"] if "mean" in data else None,
+            data["components"] if "components" in data else None,
+            data["scale"] if "scale" in data else None,
+            int(data["size"])
+        )
+        return codec, np.load(os.path.join(index_dir, cls.CODES), mmap_mode="r")
+
+
+def load_codec(index_dir, size):
+    """Loads the compressed search matrix if it matches the row count."""
+    if not os.path.exists(os.path.join(index_dir, VectorCodec.FILE)):
+        return None, None
+    codec, codes = VectorCodec.load(index_dir)
+    return (codec, codes) if codec.size == size else (None, None)
+
+
+def remove_codec(index_dir):
+    for name in (VectorCodec.FILE, VectorCodec.CODES):
+        path = os.path.join(index_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# ---------------------------------------------------------
+# IVF (INVERTED FILE) INDEX — PURE NUMPY
+# ---------------------------------------------------------
+class IVFIndex:
+    """
+    Spherical k-means partitions the vectors into `nlist` lists; a query
+    only scans the rows of the `nprobe` lists whose centroids are closest.
+    """
+
+    mode = "ivf"
+    FILE = "ivf.npz"
+
+    def __init__(self, centroids, offsets, order, nprobe, nlist_setting):
+        self.centroids = centroids    # (nlist, dim)
+        self.offsets = offsets        # list i = order[offsets[i]:offsets[i + 1]]
+        self.order = order            # row numbers grouped by list
+        self.nprobe = nprobe
+        self.nlist_setting = nlist_setting
+        self.size = int(order.shape[0])
+
+    @classmethod
+    def build(cls, vectors, nlist=0, nprobe=8, iterations=10, seed=0):
+        n = vectors.shape[0]
+        lists = nlist or max(1, int(np.sqrt(n)))
+        lists = min(lists, n)
+
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(n, lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assign = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(lists):
+                members = vectors[assign == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = normalize(centroids)
+
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[order], np.arange(lists + 1))
+
+        return cls(centroids.astype(np.float32), offsets, order, nprobe, nlist)
+
+    def candidates(self, query, k):
+        probe = min(self.nprobe, self.centroids.shape[0])
+        nearest = np.argpartition(-(self.centroids @ query), probe - 1)[:probe]
+        rows = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in nearest])
+        return rows
+
+    def describe(self):
+        return {"mode": "ivf", "nlist": self.nlist_setting, "nprobe": self.nprobe}
+
+    def save(self, index_dir):
+        np.savez(
+            os.path.join(index_dir, self.FILE),
+            centroids=self.centroids, offsets=self.offsets, order=self.order,
+            nprobe=self.nprobe, nlist_setting=self.nlist_setting
+        )
+
+    @classmethod
+    def load(cls, index_dir):
+        data = np.load(os.path.join(index_dir, cls.FILE))
+        return cls(
+            data["centroids"], data["offsets"], data["order"],
+            int(data["nprobe"]), int(data["nlist_setting"])
+        )
+
+
+# ---------------------------------------------------------
+# HNSW INDEX (hnswlib, optional)
+# ---------------------------------------------------------
+class HNSWIndex:
+    """Graph-based ANN via hnswlib, inner-product space."""
+
+    mode = "hnsw"
+    FILE = "hnsw.bin"
+    META = "hnsw.json"
+
+    def __init__(self, index, size, m, ef_construction, ef_search):
+        self.index = index
+        self.size = size
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.index.set_ef(ef_search)
+
+    @staticmethod
+    def _hnswlib():
+        try:
+            import hnswlib
+        except ImportError:
+            raise ImportError("VETBOT_INDEX_MODE=hnsw needs hnswlib: pip install hnswlib")
+        return hnswlib
+
+    @classmethod
+    def build(cls, vectors, m=16, ef_construction=200, ef_search=64):
+        hnswlib = cls._hnswlib()
+        n, dim = vectors.shape
+        index = hnswlib.Index(space="ip", dim=dim)
+        index.init_index(max_elements=n, ef_construction=ef_construction, M=m)
+        index.add_items(vectors, np.arange(n))
+        return cls(index, n, m, ef_construction, ef_search)
+
+    def candidates(self, query, k):
+        labels, _ = self.index.knn_query(query, k=min(k, self.size))
+        return labels[0].astype(np.int64)
+
+    def describe(self):
+        return {"mode": "hnsw", "m": self.m, "ef_construction": self.ef_construction, "ef_search": self.ef_search}
+
+    def save(self, index_dir):
+        self.index.save_index(os.path.join(index_dir, self.FILE))
+        with open(os.path.join(index_dir, self.META), "w", encoding="utf-8") as f:
+            json.dump({"size": self.size, "dim": self.index.dim, **self.describe()}, f)
+
+    @classmethod
+    def load(cls, index_dir):
+        hnswlib = cls._hnswlib()
+        with open(os.path.join(index_dir, cls.META), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = hnswlib.Index(space="ip", dim=meta["dim"])
+        index.load_index(os.path.join(index_dir, cls.FILE), max_elements=meta["size"])
+        return cls(index, meta["size"], meta["m"], meta["ef_construction"], meta["ef_search"])
+
+
+ANN_TYPES = {"ivf": IVFIndex, "hnsw": HNSWIndex}
+
+
+def load_ann(index_dir, size):
+    """Loads the persisted ANN structure if it matches the row count."""
+    for ann_type in ANN_TYPES.values():
+        if os.path.exists(os.path.join(index_dir, ann_type.FILE)):
+            ann = ann_type.load(index_dir)
+            return ann if ann.size == size else None
+    return None
+
+
+def remove_ann(index_dir):
+    for name in (IVFIndex.FILE, HNSWIndex.FILE, HNSWIndex.META):
+        path = os.path.join(index_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,154 @@
+"""
+Batch question answering for offline evaluation and cache warm-up.
+
+    python batch_rag.py questions.jsonl answers.jsonl --concurrency 2
+
+Input: one JSON object per line with "question" (and optionally "id").
+All questions are embedded in one batched call and retrieved in one
+vectorized search; LLM generations then run `--concurrency` at a time.
+Output: one JSON object per question with the answer, retrieved chunk
+ids, per-question timings (ms) and prefill token counts. A throughput
+summary is printed.
+"""
+import json
+import time
+import asyncio
+import argparse
+
+from backend.rag import (
+    fast_reply, get_query_embeddings, get_retriever, get_llm, get_answer_cache, get_topic_gate, build_prompt,
+    ANSWER_CACHE, TOPIC_GATE
+)
+from backend.router import route, REPLIES
+from backend.context import pack_context
+from backend.retrieval import doc_key
+
+
+def read_questions(path):
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            items.append({"id": item.get("id", n), "question": item["question"]})
+    return items
+
+
+def elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+async def generate(results, concurrency, use_cache):
+    """Runs the LLM for every result that still needs an answer."""
+    limit = asyncio.Semaphore(concurrency)
+    llm = get_llm()
+    answer_cache = get_answer_cache() if use_cache else None
+
+    async def one(result):
+        async with limit:
+            t0 = time.perf_counter()
+            try:
+                prompt_text = build_prompt(
+                    {"history": "(none)", "context": result.pop("_context"), "question": result["question"]}
+                )
+                result["answer"] = (await llm.agenerate(prompt_text, stats=result["prefill"])).strip()
+            except Exception as e:
+                result["answer"] = f"Error: {e}"
+            result["timings"]["llm_ms"] = elapsed_ms(t0)
+
+            if use_cache and result["answer"] and not result["answer"].startswith("Error:"):
+                await asyncio.to_thread(
+                    answer_cache.store, result["question"], result.pop("_vector"), result["answer"]
+                )
+
+    await asyncio.gather(*(one(r) for r in results if "_context" in r))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file with one {\"question\": ...} per line")
+    parser.add_argument("output", help="JSONL file to write answers to")
+    parser.add_argument("--concurrency", type=int, default=1, help="LLM generations in flight")
+    parser.add_argument("--no-answer-cache", action="store_true",
+                        help="always call the LLM and do not store answers (for evaluation)")
+    args = parser.parse_args()
+    use_cache = ANSWER_CACHE and not args.no_answer_cache
+
+    started = time.perf_counter()
+    results = [{**item, "timings": {}} for item in read_questions(args.input)]
+    print(f"📥 {len(results)} questions")
+
+    # Fast replies (greetings, clinics, off-topic) never reach retrieval
+    for result in results:
+        answer = fast_reply(result["question"])
+        if answer:
+            result.update(answer=answer, chunk_ids=[], route="fast")
+    pending = [r for r in results if "answer" not in r]
+
+    stages = {}
+    query_embeddings = get_query_embeddings()
+    answer_cache = get_answer_cache() if use_cache else None
+    if pending:
+        t0 = time.perf_counter()
+        vectors = query_embeddings.embed_queries([r["question"] for r in pending])
+        stages["embed_ms"] = elapsed_ms(t0)
+
+        if TOPIC_GATE:
+            gate = get_topic_gate()
+            for result, vector in zip(pending, vectors):
+                if route(result["question"]) == "unknown" and not gate.check(vector)[0]:
+                    result.update(answer=REPLIES["off_topic"], chunk_ids=[], route="off_topic")
+
+        if use_cache:
+            t0 = time.perf_counter()
+            for result, vector in zip(pending, vectors):
+                if "answer" in result:
+                    continue
+                cached_answer, _ = answer_cache.lookup(vector)
+                if cached_answer is not None:
+                    result.update(answer=cached_answer, chunk_ids=[], route="cache")
+            stages["cache_ms"] = elapsed_ms(t0)
+
+        keep = [i for i, r in enumerate(pending) if "answer" not in r]
+        pending, vectors = [pending[i] for i in keep], [vectors[i] for i in keep]
+
+    if pending:
+        t0 = time.perf_counter()
+        docs_per_question = get_retriever().search_batch([r["question"] for r in pending], vectors)
+        stages["retrieve_ms"] = elapsed_ms(t0)
+
+        for result, vector, docs in zip(pending, vectors, docs_per_question):
+            t0 = time.perf_counter()
+            result["_context"] = pack_context(docs, result["question"], vector, query_embeddings)
+            result["_vector"] = vector
+            result["chunk_ids"] = [doc_key(doc) for doc in docs]
+            result["route"] = "llm"
+            result["prefill"] = {}
+            result["timings"]["pack_ms"] = elapsed_ms(t0)
+
+        t0 = time.perf_counter()
+        asyncio.run(generate(pending, args.concurrency, use_cache))
+        stages["generate_ms"] = elapsed_ms(t0)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        for result in results:
+            result.pop("_vector", None)
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    total = time.perf_counter() - started
+    routes = {name: sum(r["route"] == name for r in results) for name in ("fast", "off_topic", "cache", "llm")}
+    print(f"⏱️ Stages (ms): {stages}")
+    print(f"✅ {len(results)} answers in {total:.1f}s → {len(results) / total * 60:.1f} questions/min {routes}")
+    print(f"🧠 Query cache: {query_embeddings.cache.stats()}")
+    # Failed requests and backends without prefill numbers (llamacpp) have no prompt_tokens
+    prefill = [r["prefill"] for r in results if "prompt_tokens" in r.get("prefill", {})]
+    if prefill:
+        saved = sum(p["prefill_saved"] for p in prefill)
+        total_prompt = sum(p["prompt_tokens"] for p in prefill)
+        print(f"🧮 Prefill: {saved}/{total_prompt} prompt tokens reused from Ollama's cache "
+              f"({saved / len(prefill):.0f} per request)")
+
+
+if __name__ == "__main__":
+    main()
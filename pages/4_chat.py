@@ -1,5 +1,9 @@
 import streamlit as st
-from backend.rag import get_rag_response, save_chat_history, load_chat_history
+from backend.scheduler import iterate_sync
+from backend.resources import start_warmup, is_ready
+from backend.router import canned_reply
+from backend.rag import astream_rag_response, LLMSession
+from backend.history import save_chat_history, load_chat_history
 
 # ---- FIXED APP TITLE (TOP-LEFT) ----
 st.markdown("""
@@ -33,28 +37,9 @@ user_id = st.session_state["user_id"]
 if "history_loaded" not in st.session_state:
     st.session_state.history_loaded = False
 
-# -----------------------------
-# QUICK EXIT WORDS
-# -----------------------------
-goodbye_triggers = [
-    "ok", "okay", "okay done", "done", "thank you",
-    "thanks", "bye", "ok bye", "okay thank you"
-]
-
-# -----------------------------
-# Non-Pet Topic Blocker (FAST)
-# -----------------------------
-non_pet_keywords = [
-    "capital", "president", "math", "country", "physics",
-    "chemistry", "france", "india", "history",
-    "human anatomy", "human brain", "computer", "machine"
-]
-
-
-def is_non_pet_question(q):
-    q = q.lower()
-    return any(word in q for word in non_pet_keywords)
-
+# Ollama token state of this chat (follow-ups skip re-prefilling the prompt)
+if "llm_session" not in st.session_state:
+    st.session_state.llm_session = LLMSession()
 
 # -----------------------------
 # ChatGPT-style Bubble UI
@@ -79,8 +64,9 @@ def user_bubble(msg):
     )
 
 
-def bot_bubble(msg):
-    st.markdown(
+def bot_bubble(msg, target=None):
+    # target: an st.empty() placeholder to redraw while streaming
+    (target or st).markdown(
         f"""
         <div style='text-align: left; margin: 10px;'>
             <div style="
@@ -98,19 +84,6 @@ def bot_bubble(msg):
         unsafe_allow_html=True
     )
 
-# -----------------------------
-# Build Conversational Context
-# -----------------------------
-def build_chat_context(messages, limit=4):
-    """
-    Builds recent conversation context for follow-up questions
-    """
-    history = []
-    for role, msg in messages[-limit*2:]:
-        prefix = "User" if role == "user" else "Assistant"
-        history.append(f"{prefix}: {msg}")
-    return "\n".join(history)
-
 # -----------------------------
 # Load Previous History
 # -----------------------------
@@ -121,6 +94,8 @@ if not st.session_state.history_loaded:
         st.session_state.messages.append(("user", q))
         st.session_state.messages.append(("bot", a))
 
+    # Only turns from this visit count as conversation context
+    st.session_state.session_start = len(st.session_state.messages)
     st.session_state.history_loaded = True
 
 
@@ -139,6 +114,13 @@ for sender, msg in st.session_state.messages:
     else:
         bot_bubble(msg)
 
+# -----------------------------
+# Readiness (models warm up in the background)
+# -----------------------------
+start_warmup()
+if not is_ready():
+    st.info("🔥 VetBot is warming up its models — the first answer may take a little longer.")
+
 # -----------------------------
 # User Input
 # -----------------------------
@@ -149,67 +131,38 @@ if user_input:
     st.session_state.messages.append(("user", user_input))
     user_bubble(user_input)
 
-    lower = user_input.lower().strip()
-
-    # FAST greeting response (no LLM, instant)
-    # FAST greeting response (flexible)
-    greeting_triggers = ["hi", "hello", "hey", "hai"]
-
-    if any(lower.startswith(greet) for greet in greeting_triggers):
-        reply = "Hi! How can I help with your pet today? 🐾"
-        bot_bubble(reply)
-        st.session_state.messages.append(("bot", reply))
-        save_chat_history(user_id, user_input, reply)
-        st.stop()
-
-    # FAST help / confusion handling
-    help_triggers = ["help", "help please", "please help", "i need help"]
-
-    if any(trigger in lower for trigger in help_triggers):
-        reply = (
-            "I'm here to help 🐾\n\n"
-            "Please tell me what’s happening with your pet — "
-            "for example symptoms, behavior changes, or concerns."
-        )
-        bot_bubble(reply)
-        st.session_state.messages.append(("bot", reply))
-        save_chat_history(user_id, user_input, reply)
-        st.stop()
-
-
-    # FAST Goodbye logic
-    if any(trigger in lower for trigger in goodbye_triggers):
-        goodbye_reply = "I'm glad I could help. Take good care of your pet — feel free to ask anytime! 🐾"
-        bot_bubble(goodbye_reply)
-        st.session_state.messages.append(("bot", goodbye_reply))
-        save_chat_history(user_id, user_input, goodbye_reply)
-        st.stop()
-
-    # FAST non-pet rejection
-    if is_non_pet_question(lower):
-        reply = "This question is not related to pets or veterinary topics, so I cannot answer it."
+    # FAST small talk / non-pet rejection (intent router, no LLM)
+    reply = canned_reply(user_input)
+    if reply:
         bot_bubble(reply)
         st.session_state.messages.append(("bot", reply))
         save_chat_history(user_id, user_input, reply)
         st.stop()
 
     # NORMAL RAG + Phi-3 response WITH CONTEXT
-    chat_context = build_chat_context(st.session_state.messages)
-    combined_query = f"""
-    Previous conversation:
-    {chat_context}
+    # Earlier turns go separately: they resolve follow-ups ("is it
+    # contagious?") and fill a small history block in the prompt
+    chat_history = st.session_state.messages[st.session_state.get("session_start", 0):-1]
 
-    Current question:
-    {user_input}
-    """
+    # Stream tokens into one bubble as phi3 produces them
+    placeholder = st.empty()
+    bot_bubble("🐾 VetBot is thinking...", placeholder)
 
-    with st.spinner("🐾 VetBot is thinking..."):
-        bot_reply, _ = get_rag_response(combined_query)
+    # LLM calls share one fair per-user queue across all sessions
+    info = {}
+    bot_reply = ""
+    for piece in iterate_sync(astream_rag_response(user_input, user_id=user_id, info=info, history=chat_history,
+                                                   session=st.session_state.llm_session)):
+        bot_reply += piece
+        bot_bubble(bot_reply + " ▌", placeholder)
 
-    bot_bubble(bot_reply)
+    bot_reply = bot_reply.strip()
+    bot_bubble(bot_reply, placeholder)
 
+    if info.get("queue_wait", 0) >= 1:
+        st.caption(f"⏳ Waited {info['queue_wait']:.1f}s for a free slot")
 
-    # Save message + history
+    # Save message + history once the full answer is in
     st.session_state.messages.append(("bot", bot_reply))
     save_chat_history(user_id, user_input, bot_reply)
 
@@ -1,5 +1,5 @@
 import streamlit as st
-from backend.rag import load_chat_history
+from backend.history import load_chat_history
 from backend.db import get_db_connection
 
 # ---------------------------------------------------------
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# Importing backend.db creates the SQLite file; keep it out of the tree
+os.environ.setdefault("VETBOT_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="vetbot-tests-"), "users.db"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
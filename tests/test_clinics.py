@@ -0,0 +1,54 @@
+import pytest
+
+from backend import clinics, rag
+
+CSV = """Clinic Name,City,Specialty,Phone
+Vet,Mumbai,General,02224567890
+Happy Paws Clinic,Chennai,"Surgery, Dermatology",04423456789
+Happy Paws Clinic,Pune,Dentistry,02029876543
+Blue Cross Hospital,Chennai,General,04412345678
+"""
+
+
+@pytest.fixture
+def clinic_data(tmp_path, monkeypatch):
+    (tmp_path / "clinics.csv").write_text(CSV)
+    monkeypatch.setattr(clinics, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(clinics, "_clinic_index", None)
+    return tmp_path
+
+
+def test_phone_numbers_keep_leading_zeros(clinic_data):
+    df = clinics.read_table(str(clinic_data / "clinics.csv"))
+
+    assert df["phone"].tolist()[0] == "02224567890"
+
+
+def test_generic_clinic_name_does_not_override_the_city(clinic_data):
+    answer = clinics.answer_clinic_query("vet clinics in chennai")
+
+    assert "Blue Cross Hospital" in answer and "Happy Paws Clinic" in answer
+    assert "Mumbai" not in answer
+
+
+def test_generic_clinic_name_alone_is_not_a_lookup(clinic_data):
+    assert clinics.answer_clinic_query("what is the best vet for my cat") is None
+
+
+def test_clinic_name_is_narrowed_by_city(clinic_data):
+    answer = clinics.answer_clinic_query("happy paws clinic in pune")
+
+    assert "Pune" in answer and "Chennai" not in answer
+
+
+def test_clinic_name_alone_is_enough(clinic_data):
+    answer = clinics.answer_clinic_query("phone number of happy paws clinic")
+
+    assert "Chennai" in answer and "Pune" in answer
+    assert "04423456789" in answer
+
+
+def test_contact_question_is_not_rejected_as_off_topic(clinic_data):
+    answer = rag.fast_reply("phone number of Blue Cross Hospital")
+
+    assert "04412345678" in answer
@@ -0,0 +1,82 @@
+from langchain_core.documents import Document
+
+from backend import context
+from backend.context import merge_adjacent, pack_context
+
+SOURCE = "data/category_infectious_diseases.txt"
+
+PARVO = Document(
+    page_content=(
+        "Canine Parvovirus (Parvo)\n"
+        "Symptoms:\n- Severe bloody diarrhea\n- Vomiting\n\n"
+        "Treatment:\n- IV fluids for dehydration\n- Anti-vomiting injections\n- Plasma transfusion in severe cases"
+    ),
+    metadata={"chunk_id": f"{SOURCE}::1"},
+)
+DISTEMPER = Document(
+    page_content=(
+        "Canine Distemper\n"
+        "Symptoms:\n- Fever, watery eyes, nasal discharge\n- Seizures\n\n"
+        "Prevention:\n- DHPP vaccine"
+    ),
+    metadata={"chunk_id": f"{SOURCE}::2"},
+)
+
+
+def test_neighbouring_chunks_about_different_diseases_stay_apart():
+    passages = merge_adjacent([PARVO, DISTEMPER])
+
+    assert passages == [PARVO.page_content, DISTEMPER.page_content]
+
+
+def test_sections_under_the_same_title_are_joined_with_a_blank_line():
+    first = Document(page_content="Canine Distemper\nSymptoms:\n- Seizures", metadata={"chunk_id": f"{SOURCE}::7"})
+    second = Document(page_content="Canine Distemper\nTreatment:\n- Supportive care", metadata={"chunk_id": f"{SOURCE}::8"})
+
+    assert merge_adjacent([second, first]) == ["Canine Distemper\nSymptoms:\n- Seizures\n\nTreatment:\n- Supportive care"]
+
+
+def test_overlapping_chunks_are_joined_without_the_repeat():
+    first = Document(page_content="Garlic is toxic to dogs and cats in large amounts.", metadata={"chunk_id": "book.pdf::3"})
+    second = Document(page_content="to dogs and cats in large amounts. Onions are worse.", metadata={"chunk_id": "book.pdf::4"})
+
+    assert merge_adjacent([first, second]) == ["Garlic is toxic to dogs and cats in large amounts. Onions are worse."]
+
+
+def test_section_headers_are_packed_with_their_bullets():
+    packed = pack_context([PARVO, DISTEMPER], "parvo treatment")
+
+    assert packed.startswith("Canine Parvovirus (Parvo)\nTreatment:\n- IV fluids for dehydration")
+    assert "- Plasma transfusion in severe cases" in packed
+    assert "Distemper" not in packed
+
+
+def test_a_section_too_long_for_the_budget_keeps_its_header_and_first_bullets():
+    packed = pack_context([PARVO], "parvo treatment", budget=20)
+
+    assert packed == "Canine Parvovirus (Parvo)\nTreatment:\n- IV fluids for dehydration"
+
+
+class CountingEmbeddings:
+    fingerprint = "counting"
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[1.0, float("Treatment" in text)] for text in texts]
+
+
+def test_section_vectors_are_embedded_once(monkeypatch):
+    monkeypatch.setattr(context, "unit_cache", context.QueryEmbeddingCache(64))
+    embeddings = CountingEmbeddings()
+
+    first = pack_context([PARVO], "parvo treatment", [0.0, 1.0], embeddings, budget=20)
+    embedded = len(embeddings.embedded)
+    second = pack_context([PARVO], "how is parvo treated", [0.0, 1.0], embeddings, budget=20)
+
+    assert first == second
+    assert first.startswith("Canine Parvovirus (Parvo)\nTreatment:")
+    assert embedded == 2
+    assert len(embeddings.embedded) == embedded
@@ -0,0 +1,71 @@
+from backend import rag
+from backend.conversation import resolve_follow_up
+from backend.router import REPLIES
+from backend.answer_cache import AnswerCache
+
+HISTORY = [("user", "my dog has parvo"), ("bot", "Parvo is a serious viral disease.")]
+
+
+def test_follow_up_gets_entities_from_history():
+    assert resolve_follow_up("how is it treated?", HISTORY) == "how is it treated? (dog, parvo)"
+
+
+def test_standalone_question_is_left_alone():
+    question = "what should I feed a kitten with diarrhea every day of the week"
+    assert resolve_follow_up(question, HISTORY) == question
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.seen = []
+
+    def embed_query(self, text):
+        self.seen.append(text)
+        return [-1.0] if "joke" in text else [1.0]
+
+
+class FakeGate:
+    def check(self, vector):
+        return vector[0] > 0, vector[0]
+
+
+def test_topic_gate_runs_on_the_question_as_asked(monkeypatch):
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(rag, "get_query_embeddings", lambda: embeddings)
+    monkeypatch.setattr(rag, "get_topic_gate", lambda: FakeGate())
+    monkeypatch.setattr(rag, "ANSWER_CACHE", False)
+
+    info = {}
+    answer = "".join(rag.stream_rag_response("tell me a joke", info, history=HISTORY))
+
+    assert answer == REPLIES["off_topic"]
+    assert info["off_topic"]
+    assert embeddings.seen == ["tell me a joke"]
+
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def stream(self, prompt, session=None, stats=None, cancel=None):
+        self.prompts.append(prompt)
+        yield "Give IV fluids."
+
+
+def test_answer_cache_keeps_the_keyword_shortcut(monkeypatch):
+    embeddings, llm = FakeEmbeddings(), FakeLLM()
+    monkeypatch.setattr(rag, "get_query_embeddings", lambda: embeddings)
+    monkeypatch.setattr(rag, "get_answer_cache", lambda: cache)
+    monkeypatch.setattr(rag, "ANSWER_CACHE", True)
+    monkeypatch.setattr(rag, "get_llm", lambda: llm)
+    monkeypatch.setattr(rag, "retrieve", lambda search_query, query_vector: ([], query_vector))
+    cache = AnswerCache("test-keyword-shortcut")
+
+    second = {}
+    assert rag.get_rag_response("parvo treatment dog", history=[])[0] == "Give IV fluids."
+    assert embeddings.seen == ["parvo treatment dog"]  # only to store the answer
+    answer = "".join(rag.stream_rag_response("Parvo treatment dog?", second, history=[]))
+
+    assert answer == "Give IV fluids."
+    assert second["cache_hit"] and len(llm.prompts) == 1
+    assert embeddings.seen == ["parvo treatment dog"]
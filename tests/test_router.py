@@ -0,0 +1,13 @@
+import json
+
+import pytest
+
+from backend.router import CORPUS_PATH, route
+
+with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+    CASES = [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case["text"] for case in CASES])
+def test_corpus_routes(case):
+    assert route(case["text"]) == case["intent"]
@@ -0,0 +1,79 @@
+import time
+import asyncio
+import threading
+
+from langchain_core.documents import Document
+
+from backend import rag
+from backend.llm import create_backend, load_llm_config
+from backend.scheduler import FairScheduler
+from backend.slo import Deadline
+from backend.extractive import FALLBACK_NOTE
+
+DOCS = [Document(page_content="Canine Parvovirus (Parvo)\nSymptoms:\n- Vomiting\n- Bloody diarrhea\n\nTreatment:\n- IV fluids")]
+CONTEXT = "Canine Parvovirus (Parvo)\nVomiting. Bloody diarrhea. IV fluids."
+
+
+def stub_backend(**settings):
+    config = load_llm_config(None)
+    config.update(backend="stub", **settings)
+    return create_backend("You are VetBot.", config)
+
+
+def use_stub(monkeypatch, llm, budget):
+    monkeypatch.setattr(rag, "get_llm", lambda: llm)
+    monkeypatch.setattr(rag, "Deadline", lambda: Deadline(budget))
+    monkeypatch.setattr(rag, "ANSWER_CACHE", False)
+    monkeypatch.setattr(rag, "prepare_query", lambda question, search_query, info: (None, None))
+    monkeypatch.setattr(rag, "retrieve", lambda search_query, query_vector: (DOCS, None))
+    monkeypatch.setattr(rag, "build_inputs", lambda inputs: {
+        "history": "(none)", "context": CONTEXT, "question": inputs["question"], "docs": DOCS,
+    })
+
+
+def test_cancel_stops_a_streaming_answer():
+    llm = stub_backend(stub_tokens_per_second=2.0)
+    prompt = f"Context:\n{CONTEXT} More words here to keep it going.\n\nQuestion:\nparvo?\n\nVetBot Answer:\n"
+    cancel, stats = threading.Event(), {}
+
+    pieces = llm.stream(prompt, stats=stats, cancel=cancel)
+    next(pieces)
+    threading.Timer(0.1, cancel.set).start()
+    t0 = time.perf_counter()
+    rest = list(pieces)
+
+    assert time.perf_counter() - t0 < 0.4
+    assert len(rest) <= 1
+    assert stats["cancelled"]
+
+
+def test_budget_fallback_keeps_llm_concurrency(monkeypatch):
+    llm = stub_backend(stub_first_token_delay=1.0)
+    use_stub(monkeypatch, llm, budget=0.3)
+    scheduler = FairScheduler(max_concurrent=1, max_queue=16)
+    monkeypatch.setattr(rag, "llm_scheduler", scheduler)
+    server = llm.stub_server
+
+    async def ask(user, delay):
+        # Later users arrive after the first one's budget is already spent
+        await asyncio.sleep(delay)
+        t0 = time.perf_counter()
+        answer = await rag.aget_rag_response("how is parvo treated", user_id=user, with_info=True)
+        return answer, time.perf_counter() - t0
+
+    async def run():
+        results = await asyncio.gather(ask("a", 0.0), ask("b", 0.35), ask("c", 0.5))
+        answers = [answer for answer, _ in results]
+        elapsed = max(seconds for _, seconds in results)
+        # Slots come back only once the stub has really dropped each request
+        while scheduler.active or scheduler.queued:
+            await asyncio.sleep(0.05)
+        return answers, elapsed
+
+    answers, elapsed = asyncio.run(run())
+
+    assert elapsed < 0.6
+    for answer, _, info in answers:
+        assert info["fallback"]
+        assert answer.startswith(FALLBACK_NOTE)
+    assert server.peak_running == 1
@@ -0,0 +1,57 @@
+import numpy as np
+
+from backend.lexical import BM25Index
+from backend.vector_index import FlatIndex
+
+
+def upsert(index, ids, vectors):
+    index.upsert(ids, vectors, [f"text of {i}" for i in ids], [{"chunk_id": i} for i in ids])
+
+
+def test_flushed_batches_are_merged_on_persist(tmp_path):
+    index = FlatIndex(str(tmp_path))
+    upsert(index, ["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+    index.flush()
+    upsert(index, ["c"], [[1.0, 1.0]])
+    index.flush()
+
+    assert index._pending == [] and index._spilled == 3
+
+    index.delete(["b"])
+    index.persist()
+    reloaded = FlatIndex(str(tmp_path))
+
+    assert reloaded.ids == ["a", "c"]
+    assert np.allclose(np.asarray(reloaded.vectors)[1], [2 ** -0.5, 2 ** -0.5])
+    doc, _ = reloaded.search([0.0, 1.0], k=1)[0]
+    assert doc.page_content == "text of c" and doc.metadata == {"chunk_id": "c"}
+
+
+def test_upserts_after_a_reload_keep_the_stored_rows(tmp_path):
+    index = FlatIndex(str(tmp_path))
+    upsert(index, ["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+    index.persist()
+
+    index = FlatIndex(str(tmp_path))
+    upsert(index, ["b"], [[1.0, 0.2]])
+    index.flush()
+    index.persist()
+
+    assert index.ids == ["a", "b"]
+    assert [doc.page_content for doc, _ in index.search([1.0, 0.0], k=2)] == ["text of a", "text of b"]
+
+
+def test_bm25_text_lives_in_the_docs_file(tmp_path):
+    path = str(tmp_path / "bm25.json")
+    lexical = BM25Index(path)
+    lexical.add(["a", "b"], ["parvo in puppies", "ear mites in cats"], [{"n": 1}, {"n": 2}])
+    lexical.add(["a"], ["parvo vaccine schedule"], [{"n": 3}])
+    lexical.delete(["b"])
+    lexical.save()
+
+    reloaded = BM25Index(path)
+
+    assert reloaded.search("parvo vaccine")[0][0] == "a"
+    assert reloaded.document("a") == ("parvo vaccine schedule", {"n": 3})
+    assert reloaded.search("mites") == []
+    assert len(open(tmp_path / "bm25_docs.jsonl").readlines()) == 1